@@ -0,0 +1,110 @@
+"""Compare extraction wall time and bytes on the wire with and without the compressed MySQL protocol.
+
+Runs against a local MySQL stand-in (the intermediate database, never the source) filled with
+synthetic rows shaped like the source tables, then reads them back the way the extractor
+does in 'stream' mode. Bytes on the wire are the server's Bytes_sent session counter.
+
+Usage, from extractor/src:
+    python -m benchmarks.compression --rows 500000 --repeat 3
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+import MySQLdb
+import MySQLdb.cursors
+from utils.config import DESTINATION_CONFIG
+from utils.tools import connect_database
+from utils.logger import setup_logging
+
+# Logging setup
+logger = setup_logging("Benchmark")
+
+TABLE = "bench_compression"
+
+def populate(config, rows, chunk_size=10000):
+    """Create the stand-in table and fill it with rows like date_heure, ID_indicateur, valeur."""
+    conn = connect_database(config)
+    cursor = conn.cursor()
+    cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+    cursor.execute(f"""
+        CREATE TABLE {TABLE} (
+            date_heure DATETIME,
+            ID_indicateur INT,
+            valeur FLOAT,
+            INDEX idx_key (date_heure, ID_indicateur)
+        )
+    """)
+    start = datetime(2025, 1, 6)
+    indicators = 400
+    batch = []
+    for i in range(rows):
+        date = start + timedelta(minutes=5 * (i // indicators))
+        batch.append((date, i % indicators, round(random.uniform(0, 1000), 2)))
+        if len(batch) == chunk_size:
+            cursor.executemany(f"INSERT INTO {TABLE} (date_heure, ID_indicateur, valeur) VALUES (%s, %s, %s)", batch)
+            batch = []
+    if batch:
+        cursor.executemany(f"INSERT INTO {TABLE} (date_heure, ID_indicateur, valeur) VALUES (%s, %s, %s)", batch)
+    conn.commit()
+    conn.close()
+    logger.info(f"Populated {TABLE} with {rows} rows")
+
+def bytes_sent(cursor):
+    """Bytes the server has sent on this session."""
+    cursor.execute("SHOW SESSION STATUS LIKE 'Bytes_sent'")
+    return int(cursor.fetchone()[1])
+
+def read_table(config, compress, chunk_size):
+    """Stream the stand-in table once and return (seconds, bytes sent by the server, rows)."""
+    conn = connect_database({**config, 'compress': compress})
+    status_cursor = conn.cursor()
+    before = bytes_sent(status_cursor)
+
+    start = time.perf_counter()
+    cursor = conn.cursor(MySQLdb.cursors.SSCursor)
+    cursor.execute(f"SELECT date_heure, ID_indicateur, valeur FROM {TABLE} ORDER BY date_heure, ID_indicateur")
+    rows = 0
+    while True:
+        chunk = cursor.fetchmany(chunk_size)
+        if not chunk:
+            break
+        rows += len(chunk)
+    cursor.close()
+    elapsed = time.perf_counter() - start
+
+    # Reading the counter itself costs a small, constant number of bytes in both modes
+    sent = bytes_sent(status_cursor) - before
+    conn.close()
+    return elapsed, sent, rows
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200000, help="Synthetic rows to generate")
+    parser.add_argument("--repeat", type=int, default=3, help="Reads per mode; the median time is reported")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="Rows per fetchmany call")
+    parser.add_argument("--keep", action="store_true", help="Keep the stand-in table afterwards")
+    args = parser.parse_args()
+
+    config = DESTINATION_CONFIG
+    populate(config, args.rows)
+    try:
+        results = {}
+        for compress in (False, True):
+            runs = [read_table(config, compress, args.chunk_size) for _ in range(args.repeat)]
+            results[compress] = (statistics.median(r[0] for r in runs), runs[0][1], runs[0][2])
+
+        print(f"{'mode':<14}{'rows':>10}{'seconds':>10}{'rows/s':>12}{'MB sent':>10}")
+        for compress, (seconds, sent, rows) in results.items():
+            print(f"{'compressed' if compress else 'uncompressed':<14}{rows:>10}{seconds:>10.2f}{rows / seconds:>12.0f}{sent / 1e6:>10.2f}")
+        plain, compressed = results[False], results[True]
+        print(f"Compression ratio {plain[1] / max(compressed[1], 1):.2f}x, time ratio {compressed[0] / plain[0]:.2f}x")
+    finally:
+        if not args.keep:
+            conn = connect_database(config)
+            conn.cursor().execute(f"DROP TABLE IF EXISTS {TABLE}")
+            conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Time table name classification on a synthetic listing: per-step regex passes versus the single-pass classifier.
+
+The per-step version reproduces the previous process_tables_names: one filter pass per
+family, a year regex per name, then two regex searches per sort key for every family
+list and again for the unified list. Logging is left out of both sides.
+
+Usage, from extractor/src:
+    python -m benchmarks.table_names --names 100000
+"""
+import argparse
+import random
+import re
+import time
+from utils.config import patterns, start_year
+from utils.tools import build_table_classifier, group_tables_by_family
+
+def generate_names(count, seed=0):
+    """Build a shuffled listing of 5min, 15min, MGW and unrelated table names."""
+    rng = random.Random(seed)
+    names = []
+    for i in range(count):
+        week, year = rng.randint(1, 52), rng.randint(2019, 2026)
+        kind = i % 4
+        if kind == 0:
+            names.append(f"{rng.choice(['CALIS', 'MEIND', 'RAIND'])}_APG43_5_S{week}_A{year}")
+        elif kind == 1:
+            names.append(f"{rng.choice(['CALIS', 'MEIND', 'RAIND'])}-APG43-15_S{week}_A{year}")
+        elif kind == 2:
+            names.append(f"NODE{rng.randint(1, 40)}MGW_S{week}_A{year}")
+        else:
+            names.append(f"other_table_{i}")
+    rng.shuffle(names)
+    return names
+
+def per_step(table_names):
+    """The previous filter / filter-by-year / sort pipeline."""
+    def by_year(tables):
+        kept = []
+        for table in tables:
+            match = re.search(r'_A(\d{4})$', table, re.IGNORECASE)
+            if match and int(match.group(1)) >= start_year:
+                kept.append(table)
+        return kept
+
+    def sort(tables):
+        return sorted(tables, key=lambda x: (
+            int(re.search(r'_A(\d{4})$', x, re.IGNORECASE).group(1)),
+            int(re.search(r'_S(\d+)_', x, re.IGNORECASE).group(1))
+        ))
+
+    families = [sort(by_year([t for t in table_names if re.match(pattern, t)])) for pattern in patterns.values()]
+    return sort([t for tables in families for t in tables])
+
+def single_pass(table_names):
+    """Classify every name once and sort on the parsed keys."""
+    classify = build_table_classifier(patterns)
+    metadata = {table: classify(table) for table in table_names}
+    return group_tables_by_family(table_names, metadata, list(patterns), start_year)[1]
+
+def best_of(func, names, repeat):
+    """Best wall time of several runs, and the result of the last one."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(names)
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--names", type=int, default=100000, help="Table names in the synthetic listing")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per version; the best time is reported")
+    args = parser.parse_args()
+
+    names = generate_names(args.names)
+    old_time, old_result = best_of(per_step, names, args.repeat)
+    new_time, new_result = best_of(single_pass, names, args.repeat)
+    if old_result != new_result:
+        raise SystemExit("Single-pass classifier disagrees with the per-step pipeline")
+
+    print(f"{len(names)} names, {len(new_result)} kept from {start_year} onwards")
+    print(f"per-step:    {old_time * 1000:8.1f} ms")
+    print(f"single-pass: {new_time * 1000:8.1f} ms ({old_time / new_time:.1f}x faster)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import threading
+from typing import Dict, List, Any, Iterator, Tuple
+from utils.config import (BATCH_SIZE, BATCH_SIZE_MIN, BATCH_SIZE_MAX, BATCH_TARGET_SECONDS, ADAPTIVE_BATCHING,
+                          PIPELINED)
+from utils.logger import setup_logging
+
+# Logging setup
+logger = setup_logging("Batching")
+
+class AdaptiveBatchSizer:
+    """Pick the number of rows per batch so that one batch takes about target_seconds.
+
+    The per-row cost of fetching and of loading is tracked as an exponential moving
+    average of the measured timings. When extraction and loading are pipelined the two
+    phases overlap and the slower one sets the pace, otherwise their costs add up.
+    Each adjustment is limited to halving or doubling the size, within [min_size, max_size].
+    """
+
+    def __init__(self, initial: int = BATCH_SIZE, min_size: int = BATCH_SIZE_MIN, max_size: int = BATCH_SIZE_MAX,
+                 target_seconds: float = BATCH_TARGET_SECONDS, enabled: bool = ADAPTIVE_BATCHING,
+                 pipelined: bool = PIPELINED, smoothing: float = 0.5):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.target_seconds = target_seconds
+        self.enabled = enabled
+        self.pipelined = pipelined
+        self.smoothing = smoothing
+        self.batch_size = max(min_size, min(max_size, initial))
+        self.fetch_cost = None
+        self.load_cost = None
+        self.lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        """Number of rows to request for the next batch."""
+        return self.batch_size
+
+    def record_fetch(self, rows: int, seconds: float):
+        """Record how long fetching a batch of rows took."""
+        if rows > 0:
+            with self.lock:
+                self.fetch_cost = self._smooth(self.fetch_cost, seconds / rows)
+
+    def record_load(self, table: str, rows: int, seconds: float):
+        """Record how long loading a batch of rows took and adjust the batch size."""
+        if rows <= 0:
+            return
+        with self.lock:
+            self.load_cost = self._smooth(self.load_cost, seconds / rows)
+            if not self.enabled or self.fetch_cost is None:
+                return
+
+            costs = (self.fetch_cost, self.load_cost)
+            row_cost = max(costs) if self.pipelined else sum(costs)
+            if row_cost <= 0:
+                return
+            ideal = self.target_seconds / row_cost
+            new_size = int(max(self.batch_size / 2, min(self.batch_size * 2, ideal)))
+            new_size = max(self.min_size, min(self.max_size, new_size))
+            if new_size == self.batch_size:
+                return
+
+            logger.info(f"Batch size for '{table}': {self.batch_size} -> {new_size} rows "
+                        f"(fetch {self.fetch_cost * 1000:.3f} ms/row, load {self.load_cost * 1000:.3f} ms/row, "
+                        f"target {self.target_seconds}s per batch)")
+            self.batch_size = new_size
+
+    def _smooth(self, previous, value):
+        """Exponential moving average of a per-row cost."""
+        if previous is None:
+            return value
+        return self.smoothing * value + (1 - self.smoothing) * previous
+
+
+class ColumnBatch:
+    """One extracted batch held as parallel column lists, e.g. Date, indicateur, valeur.
+
+    Rows are only assembled lazily, as tuples zipped from the columns while the
+    loader sends them, so the batch is never copied into a list of row tuples.
+    """
+
+    def __init__(self, columns: Dict[str, List[Any]]):
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values()), []))
+
+    def __getitem__(self, name: str) -> List[Any]:
+        return self.columns[name]
+
+    @property
+    def empty(self) -> bool:
+        return len(self) == 0
+
+    @property
+    def names(self) -> List[str]:
+        """Column names, in load order."""
+        return list(self.columns)
+
+    def rows(self) -> Iterator[Tuple[Any, ...]]:
+        """Iterate over the rows as tuples, in column order."""
+        return zip(*self.columns.values())
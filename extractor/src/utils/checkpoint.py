@@ -0,0 +1,159 @@
+import fcntl
+import json
+import os
+import threading
+import time
+from typing import Dict, Any, Optional
+from utils.config import files_paths as output_paths, CHECKPOINT_FLUSH_INTERVAL
+from utils.logger import setup_logging
+
+# Logging setup
+logger = setup_logging("Checkpoint")
+
+class CheckpointStore:
+    """Crash-safe store for per-table extraction progress.
+
+    Every update is appended as one JSON line to a write-ahead log, so the cost of a
+    checkpoint does not depend on how many tables are tracked. The log is periodically
+    compacted into the JSON snapshot read by Airflow, which is only ever replaced by an
+    atomic rename and therefore never seen half-written. Appends and compactions share
+    an flock so thread and process workers can use the same files.
+    """
+
+    def __init__(self, filename: str = output_paths['last_extracted'], flush_interval: float = CHECKPOINT_FLUSH_INTERVAL):
+        self.filename = filename
+        self.wal_filename = f"{filename}.wal"
+        self.lock_filename = f"{filename}.lock"
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.last_flush = time.monotonic()
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        # Compacting up front also drops any torn record left by a crash before new ones are appended
+        with self.lock:
+            self._compact()
+
+    def _file_lock(self):
+        """Context manager holding the exclusive inter-process lock."""
+        return _FileLock(self.lock_filename)
+
+    def _read_disk_state(self) -> Dict[str, Any]:
+        """Load the snapshot and replay the write-ahead log on top of it."""
+        state = {}
+        try:
+            with open(self.filename, 'r') as f:
+                content = f.read().strip()
+                if content:
+                    state = json.loads(content)
+        except FileNotFoundError:
+            pass
+        except json.JSONDecodeError as e:
+            logger.error(f"Invalid JSON in {self.filename}: {e}, starting from the write-ahead log only")
+
+        replayed = 0
+        try:
+            with open(self.wal_filename, 'r') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        logger.warning(f"Ignoring torn record in {self.wal_filename}")
+                        continue
+                    _apply(state, record["table"], record["info"], record.get("range_id"))
+                    replayed += 1
+        except FileNotFoundError:
+            pass
+        logger.info(f"Loaded checkpoints for {len(state)} tables from {self.filename} ({replayed} log records replayed)")
+        return state
+
+    def get(self, table: str, range_id: Optional[str] = None) -> Dict[str, Any]:
+        """Return a copy of a table's (or table range's) checkpoint entry."""
+        with self.lock:
+            entry = self.state.get(table, {})
+            if range_id is not None:
+                entry = entry.get("ranges", {}).get(range_id, {})
+            return json.loads(json.dumps(entry))
+
+    def all(self) -> Dict[str, Any]:
+        """Return a copy of every checkpoint entry."""
+        with self.lock:
+            return json.loads(json.dumps(self.state))
+
+    def update(self, table: str, info: Dict[str, Any], range_id: Optional[str] = None, flush: bool = False):
+        """Record progress for a table, or for one range of it.
+
+        The record is durable once this returns. The snapshot is rewritten when the
+        flush interval has elapsed, or immediately if flush is True.
+        """
+        record = json.dumps({"table": table, "range_id": range_id, "info": info}) + "\n"
+        with self.lock:
+            _apply(self.state, table, info, range_id)
+            with self._file_lock():
+                with open(self.wal_filename, 'a') as f:
+                    f.write(record)
+                    f.flush()
+                    os.fsync(f.fileno())
+            if flush or time.monotonic() - self.last_flush >= self.flush_interval:
+                self._compact()
+
+    def flush(self):
+        """Compact the write-ahead log into the JSON snapshot."""
+        with self.lock:
+            self._compact()
+
+    def _compact(self):
+        """Rewrite the snapshot from disk state and truncate the log. Caller holds self.lock."""
+        try:
+            with self._file_lock():
+                state = self._read_disk_state()
+                tmp_filename = f"{self.filename}.tmp"
+                with open(tmp_filename, 'w') as f:
+                    json.dump(state, f, indent=4)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_filename, self.filename)
+                open(self.wal_filename, 'w').close()
+                self.state = state
+            self.last_flush = time.monotonic()
+            logger.info(f"Saved checkpoints for {len(state)} tables to {self.filename}")
+        except Exception as e:
+            logger.error(f"Error compacting checkpoints into {self.filename}: {e}")
+            raise
+
+
+class _FileLock:
+    """Exclusive flock on a sidecar lock file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = None
+
+    def __enter__(self):
+        self.file = open(self.path, 'w')
+        fcntl.flock(self.file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        fcntl.flock(self.file, fcntl.LOCK_UN)
+        self.file.close()
+
+
+def _apply(state: Dict[str, Any], table: str, info: Dict[str, Any], range_id: Optional[str]):
+    """Merge one checkpoint record into a state dict."""
+    entry = state.setdefault(table, {})
+    if range_id is not None:
+        entry = entry.setdefault("ranges", {}).setdefault(range_id, {})
+    entry.update(info)
+
+
+_store = None
+_store_pid = None
+_store_lock = threading.Lock()
+
+def get_checkpoint_store() -> CheckpointStore:
+    """Return the process-wide checkpoint store, creating it on first use in each process."""
+    global _store, _store_pid
+    with _store_lock:
+        if _store is None or _store_pid != os.getpid():
+            _store = CheckpointStore()
+            _store_pid = os.getpid()
+        return _store
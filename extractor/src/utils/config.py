@@ -1,7 +1,7 @@
 import os
 from dotenv import load_dotenv
 import re
-from typing import Dict, Pattern
+from typing import Dict, List, Pattern
 
 # Load environment variables
 load_dotenv()
@@ -20,22 +20,44 @@ DEST_MYSQL_PASSWORD: str = os.getenv("DEST_MYSQL_PASSWORD")
 DEST_MYSQL_PORT: int = int(os.getenv("DEST_MYSQL_PORT", 3306))
 DEST_MYSQL_DB: str = os.getenv("DEST_MYSQL_DB")
 
+# Connection options: compressed client/server protocol (worth it over the WAN link to the company
+# server), socket timeouts in seconds (0 leaves the driver default) and connection charset
+SOURCE_MYSQL_COMPRESS: bool = os.getenv("SOURCE_MYSQL_COMPRESS", "false").lower() == "true"
+SOURCE_MYSQL_CONNECT_TIMEOUT: int = int(os.getenv("SOURCE_MYSQL_CONNECT_TIMEOUT", 0))
+SOURCE_MYSQL_READ_TIMEOUT: int = int(os.getenv("SOURCE_MYSQL_READ_TIMEOUT", 0))
+DEST_MYSQL_COMPRESS: bool = os.getenv("DEST_MYSQL_COMPRESS", "false").lower() == "true"
+DEST_MYSQL_CONNECT_TIMEOUT: int = int(os.getenv("DEST_MYSQL_CONNECT_TIMEOUT", 0))
+DEST_MYSQL_READ_TIMEOUT: int = int(os.getenv("DEST_MYSQL_READ_TIMEOUT", 0))
+MYSQL_CHARSET: str = os.getenv("MYSQL_CHARSET", "")
+
 # Source Configuration
 SOURCE_CONFIG = {
     'host': SOURCE_MYSQL_HOST,
     'user': SOURCE_MYSQL_USER,
     'password': SOURCE_MYSQL_PASSWORD,
     'port': SOURCE_MYSQL_PORT,
-    'database': SOURCE_MYSQL_DB
+    'database': SOURCE_MYSQL_DB,
+    'compress': SOURCE_MYSQL_COMPRESS,
+    'connect_timeout': SOURCE_MYSQL_CONNECT_TIMEOUT,
+    'read_timeout': SOURCE_MYSQL_READ_TIMEOUT,
+    'charset': MYSQL_CHARSET
 }
 
+# Intermediate load method: 'insert' (multi-row INSERT via executemany) or 'infile' (LOAD DATA LOCAL INFILE)
+LOAD_METHOD: str = os.getenv("LOAD_METHOD", "insert")
+
 # Destination Configuration
 DESTINATION_CONFIG = {
     'host': DEST_MYSQL_HOST,
     'user': DEST_MYSQL_USER,
     'password': DEST_MYSQL_PASSWORD,
     'port': DEST_MYSQL_PORT,
-    'database': DEST_MYSQL_DB
+    'database': DEST_MYSQL_DB,
+    'local_infile': LOAD_METHOD == 'infile',
+    'compress': DEST_MYSQL_COMPRESS,
+    'connect_timeout': DEST_MYSQL_CONNECT_TIMEOUT,
+    'read_timeout': DEST_MYSQL_READ_TIMEOUT,
+    'charset': MYSQL_CHARSET
 }
 
 
@@ -54,5 +76,68 @@ files_paths: Dict[str, str] = {
     '5min': './data/our_data/result_5min.txt',
     '15min': './data/our_data/result_15min.txt',
     'mgw': './data/our_data/result_mgw.txt',
-    'last_extracted': './data/last_extracted.json'
+    'last_extracted': './data/last_extracted.json',
+    'tables': './data/our_tables/tables.txt',
+    'table_metadata': './data/our_tables/table_metadata.json'
 }
+
+# Extraction strategy: 'offset' (LIMIT/OFFSET), 'keyset' (seek on the key columns)
+# or 'stream' (one server-side cursor query per table, fetched in chunks).
+# Tables without a unique index covered by KEYSET_COLUMNS are extracted with 'offset'.
+EXTRACTION_MODE: str = os.getenv("EXTRACTION_MODE", "keyset")
+
+# Columns used as the keyset cursor; an optional unique tiebreaker column is appended
+KEYSET_TIEBREAKER: str = os.getenv("KEYSET_TIEBREAKER")
+KEYSET_COLUMNS: List[str] = ['date_heure', 'ID_indicateur'] + ([KEYSET_TIEBREAKER] if KEYSET_TIEBREAKER else [])
+
+# Rows per batch (per server-side cursor chunk in 'stream' mode). BATCH_SIZE is the starting point;
+# with ADAPTIVE_BATCHING the size then moves within [BATCH_SIZE_MIN, BATCH_SIZE_MAX] so that fetching
+# and loading one batch takes about BATCH_TARGET_SECONDS
+BATCH_SIZE: int = int(os.getenv("BATCH_SIZE", 5000))
+BATCH_SIZE_MIN: int = int(os.getenv("BATCH_SIZE_MIN", 1000))
+BATCH_SIZE_MAX: int = int(os.getenv("BATCH_SIZE_MAX", 100000))
+BATCH_TARGET_SECONDS: float = float(os.getenv("BATCH_TARGET_SECONDS", 2))
+ADAPTIVE_BATCHING: bool = os.getenv("ADAPTIVE_BATCHING", "true").lower() == "true"
+
+# Number of tables extracted concurrently, and whether workers are 'thread' or 'process' based
+MAX_WORKERS: int = int(os.getenv("MAX_WORKERS", 1))
+WORKER_TYPE: str = os.getenv("WORKER_TYPE", "thread")
+
+# Connections kept per database (source, intermediate): one per worker plus the orchestrator's own
+POOL_MAX_SIZE: int = int(os.getenv("POOL_MAX_SIZE", MAX_WORKERS + 1))
+POOL_ACQUIRE_TIMEOUT: float = float(os.getenv("POOL_ACQUIRE_TIMEOUT", 300))
+
+# Split each table into one date_heure range per day so several workers can extract it
+RANGE_PARTITIONING: bool = os.getenv("RANGE_PARTITIONING", "false").lower() == "true"
+
+# Load every indicator CSV into the in-process cache before extraction starts
+PREWARM_INDICATORS: bool = os.getenv("PREWARM_INDICATORS", "true").lower() == "true"
+
+# How the intermediate tables store indicators: 'name' (indicateur VARCHAR, resolved at extraction)
+# or 'id' (ID_indicateur INT, resolved at transform time through a dimension table)
+INDICATOR_STORAGE: str = os.getenv("INDICATOR_STORAGE", "name")
+
+# Intermediate table layout. A composite (Date, indicator) index serves both the transformer's
+# SELECT DISTINCT Date and its Date = ... AND indicateur LIKE 'prefix%' lookups as range scans;
+# otherwise Date and the indicator are indexed separately. Day partitioning adds one RANGE
+# partition per day of the table's _S<week>_A<year> ISO week, so each Date lookup is pruned to one day.
+INTERMEDIATE_COMPOSITE_INDEX: bool = os.getenv("INTERMEDIATE_COMPOSITE_INDEX", "true").lower() == "true"
+INTERMEDIATE_PARTITION_BY_DAY: bool = os.getenv("INTERMEDIATE_PARTITION_BY_DAY", "false").lower() == "true"
+
+# Prefix of the per-base-table indicator dimension tables in the intermediate database
+INDICATOR_DIMENSION_PREFIX: str = "dim_indicateur_"
+
+# Seconds between compactions of the checkpoint write-ahead log into last_extracted.json
+CHECKPOINT_FLUSH_INTERVAL: float = float(os.getenv("CHECKPOINT_FLUSH_INTERVAL", 5))
+
+# Re-check completed tables for rows newer than their high-water mark, re-reading a lateness window
+INCREMENTAL_MODE: bool = os.getenv("INCREMENTAL_MODE", "false").lower() == "true"
+INCREMENTAL_LATENESS_MINUTES: int = int(os.getenv("INCREMENTAL_LATENESS_MINUTES", 15))
+
+# Progress denominators: 'exact' (SELECT COUNT(*)) or 'estimate' (information_schema TABLE_ROWS,
+# exact counts only inside open incremental windows)
+ROW_COUNT_MODE: str = os.getenv("ROW_COUNT_MODE", "estimate")
+
+# Overlap extraction and loading: a producer thread prefetches up to PIPELINE_QUEUE_SIZE batches
+PIPELINED: bool = os.getenv("PIPELINED", "false").lower() == "true"
+PIPELINE_QUEUE_SIZE: int = int(os.getenv("PIPELINE_QUEUE_SIZE", 4))
@@ -1,6 +1,8 @@
 import time
-from utils.tools import connect_database, process_tables_names, store_txt, extract_table_data
-from utils.config import patterns, start_year
+import MySQLdb
+from utils.pool import get_pool
+from utils.tools import process_tables_names, discover_tables, load_txt, store_txt, extract_table_data, extract_table_data_keyset, get_key_at_offset, has_unique_key, stream_table_data, get_date_bounds, count_rows, estimate_rows
+from utils.config import files_paths, patterns, start_year, KEYSET_COLUMNS, BATCH_SIZE
 from utils.logger import setup_logging
 
 # Logging setup
@@ -12,21 +14,40 @@ class Extractor:
         self.db = None
         self.cursor = None
         self.tables = None
+        self.table_metadata = None
         self.connect()
 
     def connect(self):
-        """Connect to the database."""
-        self.db = connect_database(self.config)  # Retries handled in tools.py
+        """Borrow a connection from the source database pool."""
+        self.pool = get_pool(self.config)
+        self.db = self.pool.acquire()
         self.cursor = self.db.cursor()
 
+    def reconnect(self):
+        """Replace a dropped connection with a fresh one from the pool."""
+        self.db = self.pool.replace(self.db)
+        self.cursor = self.db.cursor()
+
+    def close(self):
+        """Return the connection to the pool."""
+        if self.db is None:
+            return
+        try:
+            self.cursor.close()
+        except Exception as e:
+            logger.warning(f"Error closing cursor: {e}")
+        self.pool.release(self.db)
+        self.db = None
+
     def extract_tables_names(self):
-        """Extract all table names from the database and store them in a file."""
+        """Extract all table names from the database, storing them in a file when the listing changed."""
         try:
             self.cursor.execute("SHOW TABLES")
             tables = [table[0] for table in self.cursor.fetchall()]
-            tables_file_path = "./data/our_tables/tables.txt"
-            store_txt(tables, tables_file_path)
+            if tables != load_txt(files_paths['tables']):
+                store_txt(tables, files_paths['tables'])
             self.tables = tables
+            self.table_metadata = discover_tables(tables, patterns)
             logger.info(f"Extracted {len(tables)} table names")
         except Exception as e:
             logger.error(f"Error extracting table names: {e}")
@@ -36,27 +57,94 @@ class Extractor:
         """Process table names by filtering and sorting them."""
         try:
             self.extract_tables_names()
-            tables_names = process_tables_names(self.tables, patterns, start_year)
+            tables_names = process_tables_names(self.tables, patterns, start_year, self.table_metadata)
             logger.info(f"Processed table names: {tables_names}")
             return tables_names
         except Exception as e:
             logger.error(f"Error processing table names: {e}")
             raise
 
-    def extract_table_data(self, table_name, offset, batch_size=5000):
+    def extract_table_data(self, table_name, offset, batch_size=BATCH_SIZE, date_range=None):
         """Extract data from a specific table in batches with retries."""
+        return self._with_retries(table_name, lambda: extract_table_data(table_name, self.cursor, offset, batch_size, date_range))
+
+    def extract_table_data_keyset(self, table_name, last_key, batch_size=BATCH_SIZE, date_range=None):
+        """Extract the batch following last_key from a specific table with retries.
+
+        Returns a tuple of (data, next_key).
+        """
+        return self._with_retries(table_name, lambda: extract_table_data_keyset(table_name, self.cursor, last_key, KEYSET_COLUMNS, batch_size, date_range))
+
+    def count_rows(self, table_name, date_range=None):
+        """Count the rows of a table, or of a date_heure range of it, with retries."""
+        return self._with_retries(table_name, lambda: count_rows(table_name, self.cursor, date_range))
+
+    def estimate_rows(self, table_name):
+        """Read the information_schema row estimate of a table with retries."""
+        return self._with_retries(table_name, lambda: estimate_rows(table_name, self.cursor))
+
+    def get_date_bounds(self, table_name):
+        """Get the (MIN, MAX) date_heure of a table with retries."""
+        return self._with_retries(table_name, lambda: get_date_bounds(table_name, self.cursor))
+
+    def stream_table_data(self, table_name, last_key, chunk_size=BATCH_SIZE, date_range=None):
+        """Stream a table in chunks through a server-side cursor.
+
+        Yields (data, next_key) tuples. If the connection drops, it is
+        re-established and the query reopened after the last yielded key, which
+        the caller has already loaded before asking for the next chunk. Other errors
+        are raised at once. chunk_size may be a callable, so an adaptive sizer can
+        resize chunks of a running query.
+        """
+        max_retries = 3
+        retry_delay = 4
+        attempt = 0
+
+        while True:
+            try:
+                for data, next_key in stream_table_data(table_name, self.db, last_key, KEYSET_COLUMNS, chunk_size, date_range):
+                    yield data, next_key
+                    last_key = next_key
+                    attempt = 0
+                return
+            except MySQLdb.OperationalError as e:
+                if attempt < max_retries:
+                    wait_time = retry_delay * (2 ** attempt)
+                    attempt += 1
+                    logger.warning(f"Retry {attempt}/{max_retries} streaming table '{table_name}' after error: {e}. Waiting {wait_time}s...")
+                    time.sleep(wait_time)
+                    self.reconnect()
+                else:
+                    logger.error(f"Max retries ({max_retries}) reached streaming table '{table_name}': {e}")
+                    raise
+
+    def get_key_at_offset(self, table_name, offset):
+        """Convert a legacy offset checkpoint into a keyset position."""
+        return self._with_retries(table_name, lambda: get_key_at_offset(table_name, self.cursor, offset, KEYSET_COLUMNS))
+
+    def has_unique_key(self, table_name):
+        """Check that the keyset columns identify a single row of a table, with retries."""
+        return self._with_retries(table_name, lambda: has_unique_key(table_name, self.cursor, KEYSET_COLUMNS))
+
+    def _with_retries(self, table_name, func):
+        """Call func with exponential backoff retries.
+
+        func must read self.cursor when called, so a retry after a dropped
+        connection runs on the replacement connection.
+        """
         max_retries = 3
         retry_delay = 4
 
         for attempt in range(max_retries + 1):
             try:
-                data = extract_table_data(table_name, self.cursor, offset, batch_size)
-                return data
+                return func()
             except Exception as e:
                 if attempt < max_retries:
                     wait_time = retry_delay * (2 ** attempt)
                     logger.warning(f"Retry {attempt + 1}/{max_retries} for table '{table_name}' after error: {e}. Waiting {wait_time}s...")
                     time.sleep(wait_time)
+                    if isinstance(e, MySQLdb.OperationalError):
+                        self.reconnect()
                 else:
                     logger.error(f"Max retries ({max_retries}) reached for table '{table_name}': {e}")
                     raise
\ No newline at end of file
@@ -1,25 +1,95 @@
-from utils.tools import connect_database, load_batch_into_database
+import threading
+import MySQLdb
+from utils.pool import get_pool
+from utils.tools import load_batch_into_database, create_intermediate_table, create_indicator_dimension, delete_rows_since
+from utils.config import LOAD_METHOD, INDICATOR_STORAGE
 from utils.logger import setup_logging
 
 # Logging setup
 logger = setup_logging("Loader")
 
 class Loader:
-    def __init__(self, config):
+    # Schema registry shared by every Loader in the process: tables already checked or created this run
+    _known_tables = set()
+    _known_tables_lock = threading.Lock()
+
+    def __init__(self, config, method=LOAD_METHOD, storage=INDICATOR_STORAGE):
         self.config = config
+        self.method = method
+        self.storage = storage
         self.db = None
         self.cursor = None
         self.connect()
 
     def connect(self):
-        """Connect to the database."""
-        self.db = connect_database(self.config)  # Retries handled in tools.py
+        """Borrow a connection from the destination database pool."""
+        self.pool = get_pool(self.config)
+        self.db = self.pool.acquire()
+        self.cursor = self.db.cursor()
+
+    def reconnect(self):
+        """Replace a dropped connection with a fresh one from the pool."""
+        self.db = self.pool.replace(self.db)
         self.cursor = self.db.cursor()
 
+    def close(self):
+        """Return the connection to the pool."""
+        if self.db is None:
+            return
+        try:
+            self.cursor.close()
+        except Exception as e:
+            logger.warning(f"Error closing cursor: {e}")
+        self.pool.release(self.db)
+        self.db = None
+
+    def ensure_table(self, table_name):
+        """Create the destination table with its indexes the first time it is seen in this run.
+
+        In 'id' storage the table's indicator dimension is created and filled as well.
+        """
+        if table_name in Loader._known_tables:
+            return
+        with Loader._known_tables_lock:
+            if table_name in Loader._known_tables:
+                return
+            if self.storage == "id" and create_indicator_dimension(self.db, table_name) is None:
+                raise ValueError(f"No indicator mapping available for {table_name}")
+            create_intermediate_table(self.db, table_name, self.storage)
+            Loader._known_tables.add(table_name)
+
+    def _with_reconnect(self, table_name, func):
+        """Call func, and once more on a fresh connection if the current one has dropped.
+
+        func must read self.db when called, so the retry runs on the replacement connection.
+        """
+        try:
+            return func()
+        except MySQLdb.OperationalError as e:
+            logger.warning(f"Connection lost while working on {table_name}: {e}. Reconnecting and retrying once...")
+            self.reconnect()
+            return func()
+
     def load_batch_into_database(self, table_name, data):
-        """Load a batch of data into the database."""
+        """Load a batch of data into the database, retrying once on a dropped connection."""
+        def load():
+            self.ensure_table(table_name)
+            load_batch_into_database(data, self.db, table_name, self.method)
+
         try:
-            load_batch_into_database(data, self.db, table_name)
+            self._with_reconnect(table_name, load)
         except Exception as e:
             logger.error(f"Error loading batch into table {table_name}: {e}")
-            raise
\ No newline at end of file
+            raise
+
+    def delete_rows_since(self, table_name, start):
+        """Delete rows at or after start from a destination table before reloading them, retrying once on a dropped connection."""
+        def delete():
+            self.ensure_table(table_name)
+            return delete_rows_since(self.db, table_name, start)
+
+        try:
+            return self._with_reconnect(table_name, delete)
+        except Exception as e:
+            logger.error(f"Error deleting rows from table {table_name}: {e}")
+            raise
@@ -1,7 +1,16 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
 from utils.extractor import Extractor
 from utils.loader import Loader
-from utils.config import SOURCE_CONFIG, DESTINATION_CONFIG
-from utils.tools import load_last_extracted, save_last_extracted, connect_database
+from utils.config import (SOURCE_CONFIG, DESTINATION_CONFIG, EXTRACTION_MODE, MAX_WORKERS, WORKER_TYPE, RANGE_PARTITIONING, PREWARM_INDICATORS,
+                          INCREMENTAL_MODE, INCREMENTAL_LATENESS_MINUTES, ROW_COUNT_MODE,
+                          PIPELINED, PIPELINE_QUEUE_SIZE)
+from utils.tools import split_into_day_ranges, warm_indicator_cache
+from utils.checkpoint import get_checkpoint_store
+from utils.batching import AdaptiveBatchSizer
 from utils.logger import setup_logging
 
 # Logging setup
@@ -10,81 +19,358 @@ class Orchestrator:
     def __init__(self):
         self.extractor = Extractor(SOURCE_CONFIG)
         self.loader = Loader(DESTINATION_CONFIG)
-        self.batch_size = 5000
+        self.batch_sizer = AdaptiveBatchSizer()
+        self.checkpoints = get_checkpoint_store()
+        self.extraction_modes = {}
 
-    def get_total_rows(self, table, db_connection):
-        """Get the total number of rows in the source table."""
-        cursor = db_connection.cursor()
+    def get_total_rows(self, table, date_range=None):
+        """Get the number of rows to extract, used only for progress reporting.
+
+        In 'estimate' mode whole tables use the information_schema estimate, open incremental
+        windows are counted exactly, and bounded day ranges are left unknown (None).
+        """
         try:
-            cursor.execute(f"SELECT COUNT(*) FROM {table}")
-            total_rows = cursor.fetchone()[0]
-            logger.info(f"Total rows in table '{table}': {total_rows}")
+            if ROW_COUNT_MODE == "exact" or (date_range and date_range[1] is None):
+                total_rows = self.extractor.count_rows(table, date_range)
+            elif date_range:
+                total_rows = None
+            else:
+                total_rows = self.extractor.estimate_rows(table)
+            logger.info(f"Total rows in table '{table}'{f' for range {date_range}' if date_range else ''}: {total_rows}")
             return total_rows
         except Exception as e:
             logger.error(f"Error fetching row count for table {table}: {e}")
             raise
-        finally:
-            cursor.close()
+
+    def plan_ranges(self, table):
+        """Split a table into the date_heure ranges still to extract.
+
+        Returns [None] when the table is extracted as a whole, either because range
+        partitioning is disabled or because a whole-table checkpoint already exists.
+        """
+        table_info = self.checkpoints.get(table)
+        if not RANGE_PARTITIONING or "offset" in table_info or "last_key" in table_info:
+            return [None]
+
+        start, end = self.extractor.get_date_bounds(table)
+        if start is None:
+            logger.info(f"Table '{table}' is empty, nothing to partition")
+            return []
+
+        done = {range_id for range_id, info in table_info.get("ranges", {}).items() if info.get("completed", False)}
+        ranges = [date_range for date_range in split_into_day_ranges(start, end) if date_range[0] not in done]
+        logger.info(f"Split table '{table}' into {len(ranges)} pending day ranges ({len(done)} already completed)")
+        return ranges
 
     def process_table_completely(self, table):
         """Process a single table completely before moving to the next."""
+        for date_range in self.plan_ranges(table):
+            self.process_range(table, date_range)
+        self.mark_completed(table)
+
+    def mark_completed(self, table):
+        """Mark a table as fully extracted and record its overall high-water mark."""
+        # Process workers record range marks through their own stores, so reload them from disk first
+        self.checkpoints.flush()
+        info = self.checkpoints.get(table)
+        marks = [info.get("high_water_mark")] + [r.get("high_water_mark") for r in info.get("ranges", {}).values()]
+        marks = [m for m in marks if m]
+        self.checkpoints.update(table, {"completed": True, "high_water_mark": max(marks) if marks else None}, flush=True)
+
+    def process_increment(self, table):
+        """Extract rows added to an already completed table since its high-water mark.
+
+        Rows within the lateness window before the mark are deleted from the intermediate
+        table and read again, so late or out-of-order inserts are picked up without duplicates.
+        """
+        high_water_mark = self.checkpoints.get(table).get("high_water_mark")
+        if not high_water_mark:
+            high_water_mark = self.initial_high_water_mark(table)
+            if not high_water_mark:
+                logger.info(f"No extraction position recorded for '{table}', nothing to extract incrementally")
+                return
+            self.checkpoints.update(table, {"high_water_mark": high_water_mark})
+            logger.info(f"No high-water mark recorded for '{table}', derived {high_water_mark} from its checkpoint")
+
+        window_start = str(datetime.fromisoformat(high_water_mark) - timedelta(minutes=INCREMENTAL_LATENESS_MINUTES))
+        date_range = [window_start, None]
+        self.loader.delete_rows_since(table, window_start)
+        self.get_total_rows(table, date_range)
+
+        total_extracted = 0
+        for data, _ in self.batches(table, 0, None, date_range):
+            self.load_batch(table, data)
+            total_extracted += len(data)
+            high_water_mark = max(high_water_mark, str(data["Date"][-1]))
+            self.checkpoints.update(table, {"high_water_mark": high_water_mark})
+        logger.info(f"Incremental extraction for '{table}' loaded {total_extracted} rows since {window_start}, high-water mark {high_water_mark}")
+
+    def initial_high_water_mark(self, table):
+        """Derive the high-water mark of a table completed before marks were recorded.
+
+        The latest date_heure the checkpoint shows as extracted is used: the first key
+        column of the whole-table or range last_key, or of the row at a legacy offset.
+        Rows inserted after the original extraction are therefore still picked up.
+        """
+        info = self.checkpoints.get(table)
+        keys = [info.get("last_key")] + [r.get("last_key") for r in info.get("ranges", {}).values()]
+        if not info.get("last_key") and info.get("offset"):
+            keys.append(self.extractor.get_key_at_offset(table, info["offset"]))
+        marks = [str(key[0]) for key in keys if key]
+        return max(marks) if marks else None
+
+    def extraction_mode(self, table):
+        """Extraction mode of a table, falling back to 'offset' when the keyset columns are not unique.
+
+        Seeking with a strict '>' would skip the rows sharing the key of a batch boundary.
+        """
+        if table not in self.extraction_modes:
+            mode = EXTRACTION_MODE
+            if mode in ("keyset", "stream") and not self.extractor.has_unique_key(table):
+                info = self.checkpoints.get(table)
+                if info.get("last_key") or any(r.get("last_key") for r in info.get("ranges", {}).values()):
+                    # An offset cannot be recovered from a key position, so finish the table as it was started
+                    logger.warning(f"No unique index of '{table}' is covered by the keyset columns, "
+                                   f"resuming its '{mode}' checkpoint anyway (set KEYSET_TIEBREAKER)")
+                else:
+                    logger.warning(f"No unique index of '{table}' is covered by the keyset columns, "
+                                   f"using offset extraction instead of '{mode}' (set KEYSET_TIEBREAKER)")
+                    mode = "offset"
+            self.extraction_modes[table] = mode
+        return self.extraction_modes[table]
+
+    def process_range(self, table, date_range=None):
+        """Extract and load one date_heure range of a table, or the whole table if date_range is None."""
         offset = 0
+        last_key = None
         total_extracted = 0
-        last_extracted_info = load_last_extracted()
-        
-        if table in last_extracted_info and "offset" in last_extracted_info[table]:
-            offset = last_extracted_info[table]["offset"]
-            total_extracted = offset
-            logger.info(f"Resuming extraction for '{table}' from offset {offset}")
+        range_id = date_range[0] if date_range else None
+        table_info = self.checkpoints.get(table, range_id)
+        mode = self.extraction_mode(table)
 
-        source_db = connect_database(SOURCE_CONFIG)
-        total_rows = self.get_total_rows(table, source_db)
+        if mode in ("keyset", "stream") and "last_key" in table_info:
+            last_key = table_info["last_key"]
+            total_extracted = table_info.get("total_extracted", 0)
+            logger.info(f"Resuming extraction for '{table}' after key {last_key}")
+        elif "offset" in table_info:
+            offset = table_info["offset"]
+            total_extracted = offset
+            if mode in ("keyset", "stream") and range_id is None:
+                last_key = self.extractor.get_key_at_offset(table, offset)
+                logger.info(f"Converted offset {offset} checkpoint for '{table}' to key {last_key}")
+                if last_key is None:
+                    logger.info(f"Offset {offset} is past the end of '{table}', nothing left to extract")
+                    return
+            else:
+                logger.info(f"Resuming extraction for '{table}' from offset {offset}")
 
-        while True:
-            data = self.extractor.extract_table_data(table, offset, self.batch_size)
-            logger.info(f"Processing table '{table}' at offset {offset}")
-            
-            if not data:
-                logger.info(f"No more data to process for table '{table}'")
-                break
+        total_rows = self.get_total_rows(table, date_range)
 
-            self.loader.load_batch_into_database(table, data)
-            offset += len(data)
+        for data, position in self.batches(table, offset, last_key, date_range):
+            self.load_batch(table, data)
             total_extracted += len(data)
 
-            percentage = (total_extracted / total_rows) * 100 if total_rows > 0 else 0
-            last_extracted_info[table] = {
-                "offset": offset,
+            percentage = min((total_extracted / total_rows) * 100, 100) if total_rows else None
+            high_water_mark = max(table_info.get("high_water_mark", ""), str(data["Date"][-1]))
+            table_info["high_water_mark"] = high_water_mark
+            self.checkpoints.update(table, {
+                **position,
+                "high_water_mark": high_water_mark,
                 "total_extracted": total_extracted,
                 "total_rows": total_rows,
-                "percentage": round(percentage, 2)
-            }
-            save_last_extracted(last_extracted_info)
-            logger.info(f"Progress: Extracted {total_extracted}/{total_rows} rows ({percentage:.2f}%) from '{table}'")
+                "percentage": round(percentage, 2) if percentage is not None else None
+            }, range_id=range_id)
+            logger.info(f"Progress: Extracted {total_extracted}/{total_rows} rows ({f'{percentage:.2f}%' if percentage is not None else 'unknown'}) from '{table}'{f' range {range_id}' if range_id else ''}")
+
+        logger.info(f"Table '{table}'{f' range {range_id}' if range_id else ''} fully extracted ({total_extracted} rows)")
+        if range_id is not None:
+            self.checkpoints.update(table, {"completed": True}, range_id=range_id)
+
+    def load_batch(self, table, data):
+        """Load one batch into the intermediate table and feed its timing to the batch sizer."""
+        start = time.monotonic()
+        self.loader.load_batch_into_database(table, data)
+        self.batch_sizer.record_load(table, len(data), time.monotonic() - start)
 
-            if total_extracted >= total_rows:
-                logger.info(f"Table '{table}' fully extracted ({total_extracted}/{total_rows} rows)")
-                break
+    def batches(self, table, offset, last_key, date_range=None):
+        """Iterate over a table's batches, prefetched by a producer thread when PIPELINED is set."""
+        batches = self.iter_batches(table, offset, last_key, date_range)
+        if PIPELINED:
+            return prefetch(batches, PIPELINE_QUEUE_SIZE)
+        return batches
 
-        last_extracted_info[table]["completed"] = True
-        save_last_extracted(last_extracted_info)
-        source_db.close()
+    def iter_batches(self, table, offset, last_key, date_range=None):
+        """Yield (data, position) batches for a table using the configured extraction mode.
+
+        position is the checkpoint entry to persist once the batch is loaded.
+        """
+        mode = self.extraction_mode(table)
+        if mode == "stream":
+            stream = self.extractor.stream_table_data(table, last_key, lambda: self.batch_sizer.size, date_range)
+            while True:
+                start = time.monotonic()
+                chunk = next(stream, None)
+                if chunk is None:
+                    break
+                data, last_key = chunk
+                self.batch_sizer.record_fetch(len(data), time.monotonic() - start)
+                logger.info(f"Processing table '{table}' at key {last_key}")
+                yield data, {"last_key": last_key}
+            logger.info(f"No more data to process for table '{table}'")
+            return
+
+        while True:
+            start = time.monotonic()
+            if mode == "keyset":
+                data, last_key = self.extractor.extract_table_data_keyset(table, last_key, self.batch_sizer.size, date_range)
+                logger.info(f"Processing table '{table}' at key {last_key}")
+            else:
+                data = self.extractor.extract_table_data(table, offset, self.batch_sizer.size, date_range)
+                logger.info(f"Processing table '{table}' at offset {offset}")
+
+            if data is None or data.empty:
+                logger.info(f"No more data to process for table '{table}'")
+                return
+            self.batch_sizer.record_fetch(len(data), time.monotonic() - start)
+
+            if mode == "keyset":
+                yield data, {"last_key": last_key}
+            else:
+                offset += len(data)
+                yield data, {"offset": offset}
+
+    def close(self):
+        """Close the source and destination connections."""
+        self.extractor.close()
+        self.loader.close()
 
     def process_orchestration(self):
         """Orchestrate the extraction and loading process."""
         try:
             tables = self.extractor.process_tables_names()
-            last_extracted_info = load_last_extracted()
+            last_extracted_info = self.checkpoints.all()
+            if PREWARM_INDICATORS:
+                warm_indicator_cache()
 
+            pending = []
+            increments = []
             for table in tables:
                 if table in last_extracted_info and last_extracted_info[table].get("completed", False):
+                    if INCREMENTAL_MODE:
+                        increments.append(table)
+                        continue
                     logger.info(f"Skipping table '{table}' - already fully processed")
                     continue
-                
-                logger.info(f"Starting full extraction for table '{table}'")
-                self.process_table_completely(table)
-        
+                pending.append(table)
+
+            if MAX_WORKERS <= 1:
+                for table in increments:
+                    logger.info(f"Starting incremental extraction for table '{table}'")
+                    self.process_increment(table)
+                for table in pending:
+                    logger.info(f"Starting full extraction for table '{table}'")
+                    self.process_table_completely(table)
+                return
+
+            # One work item per table, or per day range when range partitioning is enabled
+            work_items = []
+            remaining = {}
+            for table in increments:
+                remaining[table] = 1
+                work_items.append((table, INCREMENT))
+            for table in pending:
+                ranges = self.plan_ranges(table)
+                if not ranges:
+                    self.mark_completed(table)
+                    continue
+                remaining[table] = len(ranges)
+                work_items.extend((table, date_range) for date_range in ranges)
+
+            executor_class = ProcessPoolExecutor if WORKER_TYPE == "process" else ThreadPoolExecutor
+            logger.info(f"Extracting {len(work_items)} work items from {len(remaining)} tables with {MAX_WORKERS} {WORKER_TYPE} workers")
+            failed = set()
+            with executor_class(max_workers=MAX_WORKERS) as executor:
+                futures = {executor.submit(process_range_in_worker, table, date_range): (table, date_range)
+                           for table, date_range in work_items}
+                for future in as_completed(futures):
+                    table, date_range = futures[future]
+                    try:
+                        future.result()
+                        logger.info(f"Worker finished table '{table}'{f' range {date_range}' if date_range else ''}")
+                    except Exception as e:
+                        logger.error(f"Worker failed on table '{table}'{f' range {date_range}' if date_range else ''}: {e}")
+                        failed.add(table)
+                    remaining[table] -= 1
+                    if remaining[table] == 0 and table not in failed and date_range != INCREMENT:
+                        self.mark_completed(table)
+                        logger.info(f"Table '{table}' fully extracted")
+            if failed:
+                raise RuntimeError(f"Extraction failed for tables: {sorted(failed)}")
+
         except Exception as e:
             logger.error(f"Error during orchestration: {e}")
             raise
+        finally:
+            self.checkpoints.flush()
+
+
+def prefetch(iterable, maxsize):
+    """Run an iterable in a producer thread, handing its items over through a bounded queue.
+
+    The consumer receives items in production order, so checkpointing after each
+    consumed batch only ever advances past fully loaded batches. The queue bound
+    applies backpressure to the producer, and an exception in the producer is
+    re-raised in the consumer.
+    """
+    items = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+    done = object()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+            put((done, None))
+        except BaseException as e:
+            put((None, e))
+
+    producer = threading.Thread(target=produce, name="batch-producer", daemon=True)
+    producer.start()
+    try:
+        while True:
+            item, error = items.get()
+            if error is not None:
+                raise error
+            if item is done:
+                return
+            yield item
+    finally:
+        stop.set()
+        producer.join()
+
+
+# Work item marker for an incremental pass over a completed table
+INCREMENT = "increment"
 
+def process_range_in_worker(table, date_range=None):
+    """Extract one table, one date_heure range of it, or its increment, in a pool worker with its own connections."""
+    orchestrator = Orchestrator()
+    try:
+        if date_range == INCREMENT:
+            logger.info(f"Starting incremental extraction for table '{table}'")
+            orchestrator.process_increment(table)
+        else:
+            logger.info(f"Starting extraction for table '{table}'{f' range {date_range}' if date_range else ''}")
+            orchestrator.process_range(table, date_range)
+    finally:
+        orchestrator.close()
@@ -0,0 +1,119 @@
+import os
+import queue
+import threading
+from typing import Dict, Any
+import MySQLdb
+from utils.tools import connect_database
+from utils.config import POOL_MAX_SIZE, POOL_ACQUIRE_TIMEOUT
+from utils.logger import setup_logging
+
+# Logging setup
+logger = setup_logging("Pool")
+
+class ConnectionPool:
+    """Bounded pool of MySQLdb connections for one database configuration.
+
+    Idle connections are health-checked with ping() before being handed out and
+    replaced transparently if the server dropped them.
+    """
+
+    def __init__(self, config: Dict[str, Any], max_size: int = POOL_MAX_SIZE):
+        self.config = config
+        self.max_size = max_size
+        self.idle = queue.LifoQueue()
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def acquire(self, timeout: float = POOL_ACQUIRE_TIMEOUT):
+        """Borrow a healthy connection, opening one if the pool is below max_size.
+
+        Raises:
+            TimeoutError: If no connection becomes available within timeout seconds.
+        """
+        while True:
+            try:
+                conn = self.idle.get_nowait()
+            except queue.Empty:
+                conn = None
+
+            if conn is None:
+                with self.lock:
+                    can_open = self.size < self.max_size
+                    if can_open:
+                        self.size += 1
+                if can_open:
+                    return self._open()
+                try:
+                    conn = self.idle.get(timeout=timeout)
+                except queue.Empty:
+                    raise TimeoutError(f"No connection to {self.config['database']} available after {timeout}s (max {self.max_size})")
+
+            if self._is_healthy(conn):
+                return conn
+            logger.warning(f"Discarding stale connection to {self.config['database']} on {self.config['host']}")
+            self.discard(conn)
+
+    def release(self, conn):
+        """Return a borrowed connection to the pool."""
+        try:
+            conn.rollback()
+        except MySQLdb.Error:
+            self.discard(conn)
+            return
+        self.idle.put(conn)
+
+    def discard(self, conn):
+        """Close a broken connection and free its slot."""
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self.lock:
+            self.size -= 1
+
+    def replace(self, conn):
+        """Discard a broken connection and borrow a fresh one in its place."""
+        self.discard(conn)
+        return self.acquire()
+
+    def close_all(self):
+        """Close every idle connection."""
+        while True:
+            try:
+                self.discard(self.idle.get_nowait())
+            except queue.Empty:
+                return
+
+    def _open(self):
+        """Open a new connection for a slot already reserved in self.size."""
+        try:
+            return connect_database(self.config)  # Retries handled in tools.py
+        except Exception:
+            with self.lock:
+                self.size -= 1
+            raise
+
+    @staticmethod
+    def _is_healthy(conn) -> bool:
+        """Check that the server still answers on a connection."""
+        try:
+            conn.ping()
+            return True
+        except MySQLdb.Error:
+            return False
+
+
+_pools: Dict[tuple, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+def get_pool(config: Dict[str, Any]) -> ConnectionPool:
+    """Return the process-wide pool for a database configuration, creating it on first use.
+
+    Pools are keyed by process id as well, so forked process workers never share sockets with their parent.
+    """
+    key = (os.getpid(), config['host'], config['port'], config['user'], config['database'])
+    with _pools_lock:
+        if key not in _pools:
+            _pools[key] = ConnectionPool(config)
+            logger.info(f"Created connection pool for {config['database']} on {config['host']} (max {_pools[key].max_size})")
+        return _pools[key]
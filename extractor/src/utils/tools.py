@@ -1,21 +1,32 @@
 import MySQLdb
+import MySQLdb.cursors
+import tempfile
+import threading
 import pandas as pd
 import re
 import json
 import os
-from typing import List, Dict, Any, Optional
+from datetime import date, datetime, timedelta
+from typing import List, Dict, Any, Optional, Tuple, Iterator, Union, Callable
 from tenacity import retry, stop_after_attempt, wait_exponential
-from utils.config import files_paths as output_paths
+from utils.config import (files_paths as output_paths, INDICATOR_STORAGE, INDICATOR_DIMENSION_PREFIX,
+                          INTERMEDIATE_COMPOSITE_INDEX, INTERMEDIATE_PARTITION_BY_DAY)
+from utils.batching import ColumnBatch
 from utils.logger import setup_logging
 
 # logger setup
 logger = setup_logging("Tools")
+
+# Optional MySQLdb.connect arguments taken from a database config when set
+CONNECTION_OPTIONS = ('compress', 'connect_timeout', 'read_timeout', 'charset')
+
 @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
 def connect_database(config: Dict[str, Any]):
     """Connect to the database using mysqlclient with retries.
     
     Args:
-        config: Dictionary with host, user, password, port, and database details.
+        config: Dictionary with host, user, password, port, and database details, plus
+            optional connection options (compress, connect_timeout, read_timeout, charset).
     
     Returns:
         MySQLdb connection object.
@@ -23,15 +34,18 @@ def connect_database(config: Dict[str, Any]):
     Raises:
         MySQLdb.Error: If connection fails after retries.
     """
+    options = {key: config[key] for key in CONNECTION_OPTIONS if config.get(key)}
     try:
         conn = MySQLdb.connect(
             host=config['host'],
             user=config['user'],
             passwd=config['password'],
             port=config['port'],
-            db=config['database']
+            db=config['database'],
+            local_infile=int(config.get('local_infile', False)),
+            **options
         )
-        logger.info(f"Successfully connected to database: {config['database']} on {config['host']}")
+        logger.info(f"Successfully connected to database: {config['database']} on {config['host']}{f' with {options}' if options else ''}")
         return conn
     except MySQLdb.Error as e:
         logger.error(f"Database connection error: {e}")
@@ -149,173 +163,212 @@ def load_txt(filename: str) -> List[str]:
         logger.error(f"Error loading text from {filename}: {e}")
         raise
 
-def filter_tables(table_names: List[str], pattern: re.Pattern) -> List[str]:
-    """Filter table names based on a regex pattern.
+def build_table_classifier(patterns: Dict[str, re.Pattern]) -> Callable[[str], Optional[List[Any]]]:
+    """Compile the family patterns into one regex that classifies a table name in a single match.
+    
+    Each family pattern becomes a named alternative of the combined regex, so the
+    family is the name of the alternative that matched and the node is its first
+    inner group. The patterns guarantee the _S<week>_A<year> suffix, which is then
+    split off without another regex.
     
     Args:
-        table_names: List of table names to filter.
-        pattern: Compiled regex pattern to match against.
+        patterns: Dictionary of regex patterns per family; group 1 captures the node.
     
     Returns:
-        Filtered list of table names.
+        Function mapping a table name to [family, node, year, week], or None if it matches no family.
     """
-    filtered = [table for table in table_names if re.match(pattern, table)]
-    logger.info(f"Filtered {len(filtered)} tables matching pattern {pattern.pattern}")
-    return filtered
+    alternatives = []
+    for i, pattern in enumerate(patterns.values()):
+        body = pattern.pattern[1:] if pattern.pattern.startswith('^') else pattern.pattern
+        body = body[:-1] if body.endswith('$') else body
+        alternatives.append(f"(?P<family{i}>{body})")
+    flags = 0
+    for pattern in patterns.values():
+        flags |= pattern.flags
+    combined = re.compile(f"^(?:{'|'.join(alternatives)})$", flags)
+    families = {f"family{i}": (family, combined.groupindex[f"family{i}"] + 1) for i, family in enumerate(patterns)}
+
+    def classify(table: str) -> Optional[List[Any]]:
+        match = combined.match(table)
+        if not match:
+            return None
+        family, node_group = families[match.lastgroup]
+        _, week, year = table.rsplit('_', 2)
+        return [family, match.group(node_group), int(year[1:]), int(week[1:])]
 
-def filter_by_year(tables: List[str], start_year: int) -> List[str]:
-    """Filter tables by year (e.g., 2024 or greater).
+    return classify
+
+def group_tables_by_family(table_names: List[str], metadata: Dict[str, Optional[List[Any]]],
+                           families: List[str], start_year: int) -> Tuple[Dict[str, List[str]], List[str]]:
+    """Filter tables by year and sort them by year and week, per family and unified, in one sort.
     
     Args:
-        tables: List of table names to filter.
+        table_names: List of all table names from the database.
+        metadata: Parsed [family, node, year, week] per table name.
+        families: Family names, in the order used to break ties between families.
         start_year: Minimum year to include.
     
     Returns:
-        Filtered list of table names.
+        Tuple of (sorted table names per family, unified sorted list of table names).
     """
-    filtered_tables = []
-    for table in tables:
-        match = re.search(r'_A(\d{4})$', table, re.IGNORECASE)
-        if match:
-            year = int(match.group(1))
-            if year >= start_year:
-                filtered_tables.append(table)
-                logger.info(f"Matched table '{table}' with year {year} >= {start_year}")
-            else:
-                logger.info(f"Skipped table '{table}' - year {year} < {start_year}")
-        else:
-            logger.warning(f"Skipped table '{table}' - no year found in format '_AXXXX'")
-    return filtered_tables
+    rank = {family: i for i, family in enumerate(families)}
+    keyed = []
+    for table in table_names:
+        info = metadata.get(table)
+        if info is not None and info[2] >= start_year:
+            keyed.append((info[2], info[3], rank[info[0]], table))
+    keyed.sort(key=lambda entry: entry[:3])
 
-def sort_by_year_and_week(tables: List[str]) -> List[str]:
-    """Sort tables by year and week.
+    by_family = {family: [] for family in families}
+    for _, _, family_rank, table in keyed:
+        by_family[families[family_rank]].append(table)
+    return by_family, [entry[3] for entry in keyed]
+
+def discover_tables(table_names: List[str], patterns: Dict[str, re.Pattern],
+                    filename: str = output_paths['table_metadata']) -> Dict[str, Optional[List[Any]]]:
+    """Return the parsed metadata of every table, parsing only names not seen in a previous run.
+    
+    The metadata of each name ever listed is cached in a JSON file together with the
+    patterns it was parsed with, so a change to the patterns rebuilds the cache.
     
     Args:
-        tables: List of table names to sort.
+        table_names: List of all table names from the database.
+        patterns: Dictionary of regex patterns per family.
+        filename: Path to the JSON discovery cache.
     
     Returns:
-        Sorted list of table names.
+        Dictionary mapping each table name to [family, node, year, week], or None for unmatched names.
     """
+    signature = {family: pattern.pattern for family, pattern in patterns.items()}
     try:
-        sorted_tables = sorted(tables, key=lambda x: (
-            int(re.search(r'_A(\d{4})$', x, re.IGNORECASE).group(1)),
-            int(re.search(r'_S(\d+)_', x, re.IGNORECASE).group(1))
-        ))
-        logger.info(f"Sorted {len(sorted_tables)} tables by year and week")
-        return sorted_tables
-    except Exception as e:
-        logger.error(f"Error sorting tables: {e}")
-        raise
+        cache = load_json(filename) or {}
+    except json.JSONDecodeError:
+        cache = {}
+    if cache.get("patterns") != signature:
+        if cache:
+            logger.info(f"Table patterns changed, rebuilding discovery cache {filename}")
+        cache = {"patterns": signature, "tables": {}}
+
+    cached = cache["tables"]
+    listed = set(table_names)
+    new_tables = [table for table in table_names if table not in cached]
+    removed_tables = [table for table in cached if table not in listed]
+    classify = build_table_classifier(patterns)
+    for table in new_tables:
+        cached[table] = classify(table)
+    for table in removed_tables:
+        del cached[table]
+    logger.info(f"Discovered {len(table_names)} tables: {len(new_tables)} new, {len(removed_tables)} removed since last run")
 
-def process_tables_names(table_names: List[str], patterns: Dict[str, re.Pattern], start_year: int) -> List[str]:
+    if new_tables or removed_tables:
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        store_json(cache, filename)
+    return {table: cached[table] for table in table_names}
+
+def process_tables_names(table_names: List[str], patterns: Dict[str, re.Pattern], start_year: int,
+                         metadata: Optional[Dict[str, Optional[List[Any]]]] = None) -> List[str]:
     """Process table names by filtering and sorting them.
     
     Args:
         table_names: List of all table names from the database.
         patterns: Dictionary of regex patterns for filtering.
         start_year: Minimum year to include.
+        metadata: Parsed [family, node, year, week] per table name, as returned by
+            discover_tables; names are parsed here if not provided.
     
     Returns:
         Unified sorted list of filtered table names.
     """
-    filtered_5min = filter_tables(table_names, patterns['5min'])
-    filtered_15min = filter_tables(table_names, patterns['15min'])
-    filtered_mgw = filter_tables(table_names, patterns['mgw'])
-    
-    logger.info(f"Found {len(filtered_5min)} 5-minute tables: {filtered_5min}")
-    logger.info(f"Found {len(filtered_15min)} 15-minute tables: {filtered_15min}")
-    logger.info(f"Found {len(filtered_mgw)} MGW tables: {filtered_mgw}")
-
-    filtered_5min_by_year = filter_by_year(filtered_5min, start_year)
-    filtered_15min_by_year = filter_by_year(filtered_15min, start_year)
-    filtered_mgw_by_year = filter_by_year(filtered_mgw, start_year)
+    if metadata is None:
+        classify = build_table_classifier(patterns)
+        metadata = {table: classify(table) for table in table_names}
 
-    sorted_5min = sort_by_year_and_week(filtered_5min_by_year)
-    sorted_15min = sort_by_year_and_week(filtered_15min_by_year)
-    sorted_mgw = sort_by_year_and_week(filtered_mgw_by_year)
+    by_family, unified_sorted_tables = group_tables_by_family(table_names, metadata, list(patterns), start_year)
+    for family, tables in by_family.items():
+        logger.info(f"Found {len(tables)} {family} tables from {start_year} onwards")
+        store_txt(tables, output_paths[family])
+        logger.info(f"Filtered {family} results saved to {output_paths[family]}")
 
-    store_txt(sorted_5min, output_paths['5min'])
-    store_txt(sorted_15min, output_paths['15min'])
-    store_txt(sorted_mgw, output_paths['mgw'])
+    logger.info(f"Total tables found: {len(unified_sorted_tables)}")
+    logger.info(f"Returning unified sorted list: {unified_sorted_tables}")
+    return unified_sorted_tables
 
-    logger.info(f"Filtered 5-minute results saved to {output_paths['5min']}")
-    logger.info(f"Filtered 15-minute results saved to {output_paths['15min']}")
-    logger.info(f"Filtered MGW results saved to {output_paths['mgw']}")
+# Process-wide indicator maps keyed by base table name: {base: (csv mtime, indicator map)}
+_indicator_cache: Dict[str, Tuple[float, Dict[int, str]]] = {}
+_indicator_cache_lock = threading.Lock()
 
-    total_tables = len(sorted_5min) + len(sorted_15min) + len(sorted_mgw)
-    logger.info(f"Total tables found: {total_tables}")
+def get_base_table_name(table: str) -> str:
+    """Strip the _S<week>_A<year> suffix from a table name.
     
-    unified_sorted_tables = sorted_5min + sorted_15min + sorted_mgw
-    unified_sorted_tables = sort_by_year_and_week(unified_sorted_tables)
-    logger.info(f"Returning unified sorted list: {unified_sorted_tables}")
-    return unified_sorted_tables
+    Args:
+        table: Table name, e.g. CALIS_APG43_5_S12_A2025.
+    
+    Returns:
+        Base table name shared by every week of the table, e.g. CALIS_APG43_5.
+    """
+    return re.sub(r'_s\d+_a\d{4}$', '', table, flags=re.IGNORECASE)
 
 def load_indicator_csv(table: str) -> Dict[int, str]:
     """Load indicator data from CSV with headers into a dictionary.
     
+    The map is cached per base table name and only re-read when the CSV's
+    modification time changes, so every week of a table shares one parse.
+    
     Args:
         table: Table name to derive the CSV filename from.
     
     Returns:
         Dictionary mapping ID_indicateur to indicateur.
     """
-    base_table_name = re.sub(r'_s\d+_a\d{4}$', '', table, flags=re.IGNORECASE)
+    base_table_name = get_base_table_name(table)
     csv_path = f"./data/indicators/indicateur_{base_table_name}.csv"
-    if not os.path.exists(csv_path):
+    try:
+        mtime = os.path.getmtime(csv_path)
+    except OSError:
         logger.warning(f"Indicator CSV not found: {csv_path}, returning empty dict")
         return {}
     
-    try:
-        df = pd.read_csv(csv_path, dtype={'ID_indicateur': int, 'indicateur': str, 'type': str})
-        indicator_map = dict(zip(df['ID_indicateur'], df['indicateur']))
-        logger.info(f"Loaded indicator map from {csv_path} with {len(indicator_map)} entries")
-        return indicator_map
-    except Exception as e:
-        logger.error(f"Error loading CSV {csv_path}: {e}")
-        return {}
+    cached = _indicator_cache.get(base_table_name)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    
+    with _indicator_cache_lock:
+        cached = _indicator_cache.get(base_table_name)
+        if cached and cached[0] == mtime:
+            return cached[1]
+        try:
+            df = pd.read_csv(csv_path, dtype={'ID_indicateur': int, 'indicateur': str, 'type': str})
+            indicator_map = dict(zip(df['ID_indicateur'].tolist(), df['indicateur']))
+            _indicator_cache[base_table_name] = (mtime, indicator_map)
+            logger.info(f"Loaded indicator map from {csv_path} with {len(indicator_map)} entries")
+            return indicator_map
+        except Exception as e:
+            logger.error(f"Error loading CSV {csv_path}: {e}")
+            return {}
 
-def load_last_extracted(filename: str = output_paths['last_extracted']) -> Dict[str, Any]:
-    """Load the last extracted data for each table from a JSON file.
+def warm_indicator_cache(indicators_dir: str = "./data/indicators") -> int:
+    """Load every indicator CSV into the cache up front.
     
     Args:
-        filename: Path to the JSON file (default from config).
+        indicators_dir: Directory containing the indicateur_<base>.csv files.
     
     Returns:
-        Dictionary with last extracted info or empty dict if not found/invalid.
+        Number of indicator maps loaded.
     """
-    try:
-        with open(filename, 'r') as f:
-            content = f.read().strip()
-            if not content:
-                logger.warning(f"{filename} is empty, returning empty dict")
-                return {}
-            data = json.loads(content)
-            logger.info(f"Loaded last extracted info from {filename}")
-            return data
-    except FileNotFoundError:
-        logger.info(f"{filename} not found, returning empty dict")
-        return {}
-    except json.JSONDecodeError as e:
-        logger.error(f"Invalid JSON in {filename}: {e}, returning empty dict")
-        return {}
-
-def save_last_extracted(last_extracted: Dict[str, Any], filename: str = output_paths['last_extracted']):
-    """Save the last extracted data for each table to a JSON file.
-    
-    Args:
-        last_extracted: Dictionary with extraction info.
-        filename: Path to the JSON file (default from config).
-    """
-    try:
-        os.makedirs(os.path.dirname(filename), exist_ok=True)
-        with open(filename, 'w') as f:
-            json.dump(last_extracted, f, indent=4)
-        logger.info(f"Saved last extracted info to {filename}")
-    except Exception as e:
-        logger.error(f"Error saving last extracted to {filename}: {e}")
-        raise
+    if not os.path.isdir(indicators_dir):
+        logger.warning(f"Indicators directory not found: {indicators_dir}, nothing to pre-warm")
+        return 0
+    
+    loaded = 0
+    for filename in sorted(os.listdir(indicators_dir)):
+        match = re.match(r'^indicateur_(.+)\.csv$', filename)
+        if match and load_indicator_csv(match.group(1)):
+            loaded += 1
+    logger.info(f"Pre-warmed indicator cache with {loaded} maps from {indicators_dir}")
+    return loaded
 
-def extract_table_data(table: str, cursor, offset: int, batch_size: int = 5000) -> Optional[List[tuple]]:
+def extract_table_data(table: str, cursor, offset: int, batch_size: int = 5000,
+                       date_range: Optional[List[str]] = None) -> Optional[ColumnBatch]:
     """Extract raw data from table in batches based on offset.
     
     Args:
@@ -323,68 +376,495 @@ def extract_table_data(table: str, cursor, offset: int, batch_size: int = 5000)
         cursor: Database cursor to execute queries.
         offset: Starting row offset for the batch.
         batch_size: Number of rows to fetch per batch (default: 5000).
+        date_range: Optional [start, end) bounds on date_heure.
     
     Returns:
-        List of tuples (date_heure, indicateur, valeur) or None if no data.
+        ColumnBatch with columns Date, indicateur, valeur or None if no data.
+    
+    Raises:
+        MySQLdb.Error: If the query fails.
     """
+    where, params = build_where_clause(None, [], date_range)
     query = f"""
         SELECT date_heure, ID_indicateur, valeur
         FROM {table}
+        {where}
         ORDER BY date_heure
         LIMIT {batch_size} OFFSET {offset}
     """
     try:
-        cursor.execute(query)
+        cursor.execute(query, params or None)
         raw_data = cursor.fetchall()
         logger.info(f"Executed query for {table} at offset {offset}, fetched {len(raw_data)} rows")
+    except MySQLdb.OperationalError as e:
+        logger.error(f"Connection error for table {table}: {e}")
+        raise
     except MySQLdb.Error as e:
+        # Raised rather than returned as None, which would end the table as if it were fully extracted
         logger.error(f"SQL error for table {table}: {e}")
-        return None
+        raise
     
     if not raw_data:
         logger.info(f"No data fetched for table {table} at offset {offset}")
         return None
     
+    return build_batch(table, raw_data)
+
+def build_batch(table: str, raw_data, storage: str = INDICATOR_STORAGE) -> Optional[ColumnBatch]:
+    """Turn raw source rows into a columnar batch for the configured indicator storage.
+    
+    Args:
+        table: Source table name.
+        raw_data: Rows starting with (date_heure, ID_indicateur, valeur); extra columns are dropped.
+        storage: 'name' to resolve indicator names now, 'id' to keep the integer ID.
+    
+    Returns:
+        ColumnBatch with columns Date, indicateur, valeur ('name') or Date, ID_indicateur, valeur ('id'),
+        or None if no mapping is available.
+    """
+    if storage == "id":
+        return ColumnBatch({
+            'Date': [row[0] for row in raw_data],
+            'ID_indicateur': [row[1] for row in raw_data],
+            'valeur': [row[2] for row in raw_data]
+        })
+    return map_indicators(table, raw_data)
+
+def map_indicators(table: str, raw_data) -> Optional[ColumnBatch]:
+    """Replace ID_indicateur with the indicator name in raw source rows, column by column.
+    
+    IDs that are NULL or missing from the indicator map become "Unknown".
+    
+    Args:
+        table: Source table name, used to find the indicator CSV.
+        raw_data: Rows starting with (date_heure, ID_indicateur, valeur); extra columns are dropped.
+    
+    Returns:
+        ColumnBatch with columns Date, indicateur, valeur, or None if no mapping is available.
+    """
     indicator_map = load_indicator_csv(table)
     if not indicator_map:
         logger.error(f"Cannot proceed without indicator mapping for {table}")
         return None
     
-    result = []
-    for date_heure, id_indicateur, valeur in raw_data:
-        indicateur = indicator_map.get(id_indicateur, "Unknown")
-        result.append((date_heure, indicateur, valeur))
-    
+    lookup = indicator_map.get
+    result = ColumnBatch({
+        'Date': [row[0] for row in raw_data],
+        'indicateur': [lookup(row[1], "Unknown") for row in raw_data],
+        'valeur': [row[2] for row in raw_data]
+    })
     logger.info(f"Processed {len(result)} rows for {table} with indicator mapping")
     return result
 
-def load_batch_into_database(batch: List[tuple], target_db, target_table: str):
+def serialize_key(values: tuple) -> List[Any]:
+    """Convert a keyset cursor position into JSON-serializable values.
+    
+    Args:
+        values: Key column values as returned by the database.
+    
+    Returns:
+        List of values, with datetimes rendered as 'YYYY-MM-DD HH:MM:SS' strings.
+    """
+    return [str(v) if isinstance(v, datetime) else v for v in values]
+
+def build_keyset_predicate(key_columns: List[str]) -> str:
+    """Build the WHERE predicate selecting rows strictly after a keyset position.
+    
+    The row-value comparison (a, b, c) > (x, y, z) is expanded into
+    a > x OR (a = x AND b > y) OR (a = x AND b = y AND c > z) so MySQL can
+    use a range scan on the leading column.
+    
+    Args:
+        key_columns: Ordered key columns.
+    
+    Returns:
+        SQL predicate with %s placeholders; see keyset_params for the matching parameters.
+    """
+    clauses = []
+    for i, column in enumerate(key_columns):
+        equalities = [f"{c} = %s" for c in key_columns[:i]]
+        clauses.append("(" + " AND ".join(equalities + [f"{column} > %s"]) + ")")
+    return " OR ".join(clauses)
+
+def keyset_params(last_key: List[Any]) -> List[Any]:
+    """Expand a keyset position into the parameters of build_keyset_predicate.
+    
+    Args:
+        last_key: Key values of the last row already extracted.
+    
+    Returns:
+        Flat parameter list in predicate order.
+    """
+    params = []
+    for i in range(len(last_key)):
+        params.extend(last_key[:i + 1])
+    return params
+
+def build_where_clause(last_key: Optional[List[Any]], key_columns: List[str],
+                       date_range: Optional[List[str]] = None) -> Tuple[str, List[Any]]:
+    """Build the WHERE clause combining a date_heure range and a keyset position.
+    
+    Args:
+        last_key: Key values of the last extracted row, or None.
+        key_columns: Ordered key columns.
+        date_range: Optional [start, end) bounds on date_heure; end may be None for an open range.
+    
+    Returns:
+        Tuple of (WHERE clause or empty string, query parameters).
+    """
+    conditions = []
+    params = []
+    if date_range:
+        conditions.append("date_heure >= %s")
+        params.append(date_range[0])
+        if date_range[1] is not None:
+            conditions.append("date_heure < %s")
+            params.append(date_range[1])
+    if last_key:
+        conditions.append(f"({build_keyset_predicate(key_columns)})")
+        params.extend(keyset_params(last_key))
+    if not conditions:
+        return "", params
+    return "WHERE " + " AND ".join(conditions), params
+
+def count_rows(table: str, cursor, date_range: Optional[List[str]] = None) -> int:
+    """Count the rows of a table, or of one date_heure range of it, with SELECT COUNT(*).
+    
+    Args:
+        table: Name of the table.
+        cursor: Database cursor to execute queries.
+        date_range: Optional [start, end) bounds on date_heure; end may be None.
+    
+    Returns:
+        Exact number of rows.
+    """
+    where, params = build_where_clause(None, [], date_range)
+    cursor.execute(f"SELECT COUNT(*) FROM {table} {where}", params or None)
+    return cursor.fetchone()[0]
+
+def estimate_rows(table: str, cursor) -> Optional[int]:
+    """Read the storage engine's row estimate for a table from information_schema.
+    
+    Args:
+        table: Name of the table.
+        cursor: Database cursor to execute queries.
+    
+    Returns:
+        Approximate number of rows, or None if the table is unknown.
+    """
+    cursor.execute(
+        "SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+        (table,)
+    )
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+def get_date_bounds(table: str, cursor) -> Tuple[Optional[datetime], Optional[datetime]]:
+    """Get the smallest and largest date_heure of a table.
+    
+    Args:
+        table: Name of the table.
+        cursor: Database cursor to execute queries.
+    
+    Returns:
+        Tuple of (min, max) date_heure, both None for an empty table.
+    """
+    cursor.execute(f"SELECT MIN(date_heure), MAX(date_heure) FROM {table}")
+    return cursor.fetchone()
+
+def split_into_day_ranges(start: datetime, end: datetime) -> List[List[str]]:
+    """Split the span between two datetimes into disjoint [start, end) day ranges.
+    
+    Args:
+        start: Smallest date_heure in the table.
+        end: Largest date_heure in the table.
+    
+    Returns:
+        List of [day start, next day start] pairs as 'YYYY-MM-DD HH:MM:SS' strings.
+    """
+    ranges = []
+    day = datetime.combine(start.date(), datetime.min.time())
+    while day <= end:
+        next_day = day + timedelta(days=1)
+        ranges.append([str(day), str(next_day)])
+        day = next_day
+    return ranges
+
+def get_key_at_offset(table: str, cursor, offset: int, key_columns: List[str]) -> Optional[List[Any]]:
+    """Find the keyset position of the last row before an offset.
+    
+    Used once to convert a legacy offset checkpoint into a keyset position.
+    
+    Args:
+        table: Name of the table.
+        cursor: Database cursor to execute queries.
+        offset: Number of rows already extracted.
+        key_columns: Ordered key columns.
+    
+    Returns:
+        Key values of row number offset - 1, or None if offset is 0 or past the end.
+    """
+    if offset <= 0:
+        return None
+    order_by = ', '.join(key_columns)
+    cursor.execute(f"SELECT {order_by} FROM {table} ORDER BY {order_by} LIMIT 1 OFFSET {offset - 1}")
+    row = cursor.fetchone()
+    return serialize_key(row) if row else None
+
+def has_unique_key(table: str, cursor, key_columns: List[str]) -> bool:
+    """Check that a unique index of a table is covered by the key columns.
+
+    Seeking past the last key with a strict '>' only visits every row once when
+    no two rows share the same key values.
+
+    Args:
+        table: Name of the table.
+        cursor: Database cursor to execute queries.
+        key_columns: Ordered key columns.
+
+    Returns:
+        True if every column of some unique index is one of the key columns.
+    """
+    cursor.execute(
+        "SELECT INDEX_NAME, COLUMN_NAME FROM information_schema.STATISTICS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND NON_UNIQUE = 0",
+        (table,)
+    )
+    indexes = {}
+    for index_name, column_name in cursor.fetchall():
+        indexes.setdefault(index_name, set()).add(column_name)
+    return any(columns <= set(key_columns) for columns in indexes.values())
+
+def extract_table_data_keyset(table: str, cursor, last_key: Optional[List[Any]], key_columns: List[str],
+                              batch_size: int = 5000,
+                              date_range: Optional[List[str]] = None) -> Tuple[Optional[ColumnBatch], Optional[List[Any]]]:
+    """Extract raw data from table in batches by seeking past the last extracted key.
+    
+    Unlike OFFSET paging, each batch costs the same regardless of how deep into the table it is.
+    
+    Args:
+        table: Name of the table to extract from.
+        cursor: Database cursor to execute queries.
+        last_key: Key values of the last extracted row, or None to start from the beginning.
+        key_columns: Ordered key columns, starting with date_heure and ID_indicateur.
+        batch_size: Number of rows to fetch per batch (default: 5000).
+        date_range: Optional [start, end) bounds on date_heure.
+    
+    Returns:
+        Tuple of (ColumnBatch with columns Date, indicateur, valeur or None if no data, key of the last fetched row).
+    """
+    order_by = ', '.join(key_columns)
+    extra_columns = ''.join(f", {c}" for c in key_columns[2:])
+    where, params = build_where_clause(last_key, key_columns, date_range)
+    query = f"""
+        SELECT date_heure, ID_indicateur, valeur{extra_columns}
+        FROM {table}
+        {where}
+        ORDER BY {order_by}
+        LIMIT {batch_size}
+    """
+    try:
+        cursor.execute(query, params or None)
+        raw_data = cursor.fetchall()
+        logger.info(f"Executed keyset query for {table} after key {last_key}, fetched {len(raw_data)} rows")
+    except MySQLdb.Error as e:
+        logger.error(f"SQL error for table {table}: {e}")
+        raise
+    
+    if not raw_data:
+        logger.info(f"No data fetched for table {table} after key {last_key}")
+        return None, last_key
+    
+    last_row = raw_data[-1]
+    next_key = serialize_key((last_row[0], last_row[1]) + tuple(last_row[3:]))
+    return build_batch(table, raw_data), next_key
+
+def get_table_week_days(table: str) -> Optional[List[date]]:
+    """Return the seven days of the ISO week a table covers, from its _S<week>_A<year> suffix.
+    
+    Args:
+        table: Table name, e.g. CALIS_APG43_5_S12_A2025.
+    
+    Returns:
+        List of dates from Monday to Sunday, or None if the name has no valid week suffix.
+    """
+    match = re.search(r'_S(\d+)_A(\d{4})$', table, re.IGNORECASE)
+    if not match:
+        return None
+    try:
+        monday = date.fromisocalendar(int(match.group(2)), int(match.group(1)), 1)
+    except ValueError:
+        return None
+    return [monday + timedelta(days=i) for i in range(7)]
+
+def build_day_partitions(table: str) -> str:
+    """Build a PARTITION BY RANGE clause with one partition per day of a table's week.
+    
+    Rows outside the week land in catch-all partitions before and after it, so the
+    layout never rejects data.
+    
+    Args:
+        table: Table name with a _S<week>_A<year> suffix.
+    
+    Returns:
+        The partitioning clause, or an empty string if the week cannot be derived from the name.
+    """
+    days = get_table_week_days(table)
+    if days is None:
+        logger.warning(f"No week suffix in {table}, creating it without day partitions")
+        return ""
+    partitions = [f"PARTITION p_before VALUES LESS THAN (TO_DAYS('{days[0]}'))"]
+    for day in days:
+        partitions.append(f"PARTITION p{day:%Y%m%d} VALUES LESS THAN (TO_DAYS('{day + timedelta(days=1)}'))")
+    partitions.append("PARTITION p_after VALUES LESS THAN MAXVALUE")
+    return "PARTITION BY RANGE (TO_DAYS(Date)) (\n                " + ",\n                ".join(partitions) + "\n            )"
+
+def create_intermediate_table(target_db, target_table: str, storage: str = INDICATOR_STORAGE,
+                              composite_index: bool = INTERMEDIATE_COMPOSITE_INDEX,
+                              partition_by_day: bool = INTERMEDIATE_PARTITION_BY_DAY):
+    """Create an intermediate table with the indexes the transformer relies on.
+    
+    Args:
+        target_db: Target database connection.
+        target_table: Name of the table to create.
+        storage: 'name' for an indicateur VARCHAR column, 'id' for a 4-byte ID_indicateur column.
+        composite_index: Index (Date, indicator) together rather than each column on its own.
+        partition_by_day: Partition the table by RANGE on the day of Date.
+    """
+    if storage == "id":
+        indicator_name = "ID_indicateur"
+        indicator_column = "ID_indicateur INT"
+    else:
+        indicator_name = "indicateur"
+        indicator_column = "indicateur VARCHAR(255)"
+    if composite_index:
+        indexes = f"INDEX idx_date_indicateur (Date, {indicator_name})"
+    else:
+        indexes = f"INDEX idx_date (Date),\n                INDEX idx_indicateur ({indicator_name})"
+    partitions = build_day_partitions(target_table) if partition_by_day else ""
+    cursor = target_db.cursor()
+    try:
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {target_table} (
+                Date DATETIME,
+                {indicator_column},
+                valeur FLOAT,
+                {indexes}
+            )
+            {partitions}
+        """)
+        target_db.commit()
+        logger.info(f"Created table {target_table} or it already exists ({'composite' if composite_index else 'separate'} indexes{', partitioned by day' if partitions else ''})")
+    except MySQLdb.Error as e:
+        logger.error(f"Error creating table {target_table}: {e}")
+        target_db.rollback()
+        raise
+    finally:
+        cursor.close()
+
+def create_indicator_dimension(target_db, table: str) -> Optional[str]:
+    """Create and fill the indicator dimension table for a table's base name.
+    
+    The table maps ID_indicateur to indicateur so the transformer can resolve
+    names with a join instead of the intermediate tables storing them.
+    
+    Args:
+        target_db: Target database connection.
+        table: Source table name; its base name selects the indicator CSV.
+    
+    Returns:
+        Name of the dimension table, or None if no indicator CSV exists.
+    """
+    indicator_map = load_indicator_csv(table)
+    if not indicator_map:
+        logger.error(f"Cannot create indicator dimension without indicator mapping for {table}")
+        return None
+    
+    dimension_table = f"{INDICATOR_DIMENSION_PREFIX}{get_base_table_name(table)}"
+    cursor = target_db.cursor()
+    try:
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {dimension_table} (
+                ID_indicateur INT NOT NULL PRIMARY KEY,
+                indicateur VARCHAR(255),
+                INDEX idx_indicateur (indicateur)
+            )
+        """)
+        cursor.executemany(
+            f"REPLACE INTO {dimension_table} (ID_indicateur, indicateur) VALUES (%s, %s)",
+            [(int(k), v) for k, v in indicator_map.items()]
+        )
+        target_db.commit()
+        logger.info(f"Loaded {len(indicator_map)} indicators into {dimension_table}")
+        return dimension_table
+    except MySQLdb.Error as e:
+        logger.error(f"Error creating indicator dimension {dimension_table}: {e}")
+        target_db.rollback()
+        raise
+    finally:
+        cursor.close()
+
+def delete_rows_since(target_db, target_table: str, start: str) -> int:
+    """Delete intermediate rows at or after a date, so a window can be reloaded without duplicates.
+    
+    Args:
+        target_db: Target database connection.
+        target_table: Name of the intermediate table.
+        start: Lower bound on Date, as 'YYYY-MM-DD HH:MM:SS'.
+    
+    Returns:
+        Number of rows deleted.
+    """
+    cursor = target_db.cursor()
+    try:
+        deleted = cursor.execute(f"DELETE FROM {target_table} WHERE Date >= %s", (start,))
+        target_db.commit()
+        logger.info(f"Deleted {deleted} rows from {target_table} since {start}")
+        return deleted
+    except MySQLdb.Error as e:
+        logger.error(f"Error deleting rows from {target_table} since {start}: {e}")
+        target_db.rollback()
+        raise
+    finally:
+        cursor.close()
+
+# Cleared the first time the server rejects LOAD DATA LOCAL INFILE, so later batches go straight to INSERT
+_local_infile_enabled = True
+
+# Error codes meaning local infile is turned off on the client or the server, rather than a failed load:
+# ER_NOT_ALLOWED_COMMAND, CR_LOAD_DATA_LOCAL_INFILE_REJECTED, ER_CLIENT_LOCAL_FILES_DISABLED
+LOCAL_INFILE_REJECTED_ERRORS = (1148, 2068, 3948)
+
+def load_batch_into_database(batch: ColumnBatch, target_db, target_table: str, method: str = "insert"):
     """Load a batch of data into the target database.
     
     Args:
-        batch: List of tuples (date_heure, indicateur, valeur) to load.
+        batch: ColumnBatch with columns Date, indicateur or ID_indicateur, valeur (see build_batch).
         target_db: Target database connection.
         target_table: Name of the table to load into.
+        method: 'insert' for multi-row INSERT or 'infile' for LOAD DATA LOCAL INFILE,
+            falling back to 'insert' if local infile is disabled. Other errors are raised.
+    
+    The target table must already exist; see create_intermediate_table.
     """
     cursor = target_db.cursor()
     try:
-        cursor.execute(f"SHOW TABLES LIKE '{target_table}'")
-        if not cursor.fetchone():
-            create_query = f"""
-                CREATE TABLE {target_table} (
-                    Date DATETIME,
-                    indicateur VARCHAR(255),
-                    valeur FLOAT
-                )
-            """
-            cursor.execute(create_query)
-            target_db.commit()
-            logger.info(f"Created table {target_table}")
-
-        columns = ['Date', 'indicateur', 'valeur']
-        placeholders = ', '.join(['%s'] * len(batch[0]))
+        if method == "infile" and _local_infile_enabled:
+            try:
+                load_batch_infile(batch, cursor, target_table)
+                target_db.commit()
+                logger.info(f"Successfully loaded {len(batch)} rows into {target_table} via LOAD DATA LOCAL INFILE")
+                return
+            except MySQLdb.Error as e:
+                if not e.args or e.args[0] not in LOCAL_INFILE_REJECTED_ERRORS:
+                    raise
+                disable_local_infile(e)
+                target_db.rollback()
+
+        columns = batch.names
+        placeholders = ', '.join(['%s'] * len(columns))
         insert_query = f"INSERT INTO {target_table} ({', '.join(columns)}) VALUES ({placeholders})"
-        cursor.executemany(insert_query, batch)
+        cursor.executemany(insert_query, batch.rows())
         target_db.commit()
         logger.info(f"Successfully loaded {len(batch)} rows into {target_table}")
     except MySQLdb.Error as e:
@@ -392,4 +872,107 @@ def load_batch_into_database(batch: List[tuple], target_db, target_table: str):
         target_db.rollback()
         raise
     finally:
-        cursor.close()
\ No newline at end of file
+        cursor.close()
+
+def disable_local_infile(error: Exception):
+    """Stop using LOAD DATA LOCAL INFILE for the rest of the process.
+    
+    Args:
+        error: The error returned by the server.
+    """
+    global _local_infile_enabled
+    _local_infile_enabled = False
+    logger.warning(f"LOAD DATA LOCAL INFILE failed ({error}), falling back to multi-row INSERT")
+
+def escape_tsv_value(value: Any) -> str:
+    """Render a value as a LOAD DATA field with the default escaping rules.
+    
+    Args:
+        value: Value to render.
+    
+    Returns:
+        Escaped field, with None rendered as \\N.
+    """
+    if value is None:
+        return "\\N"
+    text = str(value)
+    if isinstance(value, str):
+        text = text.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n")
+    return text
+
+def load_batch_infile(batch: ColumnBatch, cursor, target_table: str):
+    """Load a batch through LOAD DATA LOCAL INFILE using a temporary TSV file.
+    
+    The caller is responsible for committing.
+    
+    Args:
+        batch: ColumnBatch with columns Date, indicateur or ID_indicateur, valeur.
+        cursor: Cursor on a connection opened with local_infile enabled.
+        target_table: Name of the table to load into.
+    """
+    with tempfile.NamedTemporaryFile('w', suffix='.tsv', encoding='utf-8', delete=False) as f:
+        for row in batch.rows():
+            f.write('\t'.join(escape_tsv_value(v) for v in row) + '\n')
+        tsv_path = f.name
+    try:
+        cursor.execute(f"""
+            LOAD DATA LOCAL INFILE %s
+            INTO TABLE {target_table}
+            CHARACTER SET utf8mb4
+            FIELDS TERMINATED BY '\\t'
+            LINES TERMINATED BY '\\n'
+            ({', '.join(batch.names)})
+        """, (tsv_path,))
+    finally:
+        os.remove(tsv_path)
+
+def stream_table_data(table: str, db, last_key: Optional[List[Any]], key_columns: List[str],
+                      chunk_size: Union[int, Callable[[], int]] = 5000,
+                      date_range: Optional[List[str]] = None) -> Iterator[Tuple[ColumnBatch, List[Any]]]:
+    """Stream a table through a single server-side cursor query, in chunks.
+    
+    Rows are read from the socket as they are consumed, so memory stays bounded
+    by chunk_size no matter how large the table is. The connection cannot run
+    other queries until the generator is exhausted or closed.
+    
+    Args:
+        table: Name of the table to extract from.
+        db: Database connection dedicated to the stream.
+        last_key: Key values of the last extracted row, or None to start from the beginning.
+        key_columns: Ordered key columns, starting with date_heure and ID_indicateur.
+        chunk_size: Number of rows per yielded chunk (default: 5000), or a callable
+            returning it, read again before every chunk.
+        date_range: Optional [start, end) bounds on date_heure.
+    
+    Yields:
+        Tuples of (ColumnBatch with columns Date, indicateur, valeur, key of the last row in the chunk).
+    """
+    order_by = ', '.join(key_columns)
+    extra_columns = ''.join(f", {c}" for c in key_columns[2:])
+    where, params = build_where_clause(last_key, key_columns, date_range)
+    query = f"""
+        SELECT date_heure, ID_indicateur, valeur{extra_columns}
+        FROM {table}
+        {where}
+        ORDER BY {order_by}
+    """
+    cursor = db.cursor(MySQLdb.cursors.SSCursor)
+    try:
+        cursor.execute(query, params or None)
+        logger.info(f"Opened streaming query for {table} after key {last_key}")
+        while True:
+            raw_data = cursor.fetchmany(chunk_size() if callable(chunk_size) else chunk_size)
+            if not raw_data:
+                logger.info(f"Streaming query for {table} exhausted")
+                return
+            last_row = raw_data[-1]
+            next_key = serialize_key((last_row[0], last_row[1]) + tuple(last_row[3:]))
+            data = build_batch(table, raw_data)
+            if data is None:
+                return
+            yield data, next_key
+    except MySQLdb.Error as e:
+        logger.error(f"SQL error while streaming table {table}: {e}")
+        raise
+    finally:
+        cursor.close()
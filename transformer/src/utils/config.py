@@ -21,13 +21,26 @@ DEST_DB_NAME_5MIN = os.getenv("DEST_MYSQL_DB_5MIN")
 DEST_DB_NAME_15MIN = os.getenv("DEST_MYSQL_DB_15MIN")
 DEST_DB_NAME_MGW = os.getenv("DEST_MYSQL_DB_MGW")
 
+# Connection options: compressed protocol, socket timeouts in seconds (0 leaves the driver default) and charset
+SOURCE_DB_COMPRESS = os.getenv("SOURCE_MYSQL_COMPRESS", "false").lower() == "true"
+SOURCE_DB_CONNECT_TIMEOUT = int(os.getenv("SOURCE_MYSQL_CONNECT_TIMEOUT", default=0))
+SOURCE_DB_READ_TIMEOUT = int(os.getenv("SOURCE_MYSQL_READ_TIMEOUT", default=0))
+DEST_DB_COMPRESS = os.getenv("DEST_MYSQL_COMPRESS", "false").lower() == "true"
+DEST_DB_CONNECT_TIMEOUT = int(os.getenv("DEST_MYSQL_CONNECT_TIMEOUT", default=0))
+DEST_DB_READ_TIMEOUT = int(os.getenv("DEST_MYSQL_READ_TIMEOUT", default=0))
+DB_CHARSET = os.getenv("MYSQL_CHARSET", "")
+
 # Source Database config
 SOURCE_DB_CONFIG = {
     'host': SOURCE_DB_HOST,
     'user': SOURCE_DB_USER,
     'password': SOURCE_DB_PASSWORD,
     'port': SOURCE_DB_PORT,
-    'database': SOURCE_DB_NAME
+    'database': SOURCE_DB_NAME,
+    'compress': SOURCE_DB_COMPRESS,
+    'connect_timeout': SOURCE_DB_CONNECT_TIMEOUT,
+    'read_timeout': SOURCE_DB_READ_TIMEOUT,
+    'charset': DB_CHARSET
 }
 
 # 5min Destination Database config
@@ -36,7 +49,11 @@ DEST_DB_CONFIG_5MIN = {
     'user': DEST_DB_USER,
     'password': DEST_DB_PASSWORD,
     'port': DEST_DB_PORT,
-    'database': DEST_DB_NAME_5MIN
+    'database': DEST_DB_NAME_5MIN,
+    'compress': DEST_DB_COMPRESS,
+    'connect_timeout': DEST_DB_CONNECT_TIMEOUT,
+    'read_timeout': DEST_DB_READ_TIMEOUT,
+    'charset': DB_CHARSET
 }
 
 # 15min Destination Database config
@@ -45,7 +62,11 @@ DEST_DB_CONFIG_15MIN = {
     'user': DEST_DB_USER,
     'password': DEST_DB_PASSWORD,
     'port': DEST_DB_PORT,
-    'database': DEST_DB_NAME_15MIN
+    'database': DEST_DB_NAME_15MIN,
+    'compress': DEST_DB_COMPRESS,
+    'connect_timeout': DEST_DB_CONNECT_TIMEOUT,
+    'read_timeout': DEST_DB_READ_TIMEOUT,
+    'charset': DB_CHARSET
 }
 
 # MGW Destination Database config
@@ -54,7 +75,11 @@ DEST_DB_CONFIG_MGW = {
     'user': DEST_DB_USER,
     'password': DEST_DB_PASSWORD,
     'port': DEST_DB_PORT,
-    'database': DEST_DB_NAME_MGW
+    'database': DEST_DB_NAME_MGW,
+    'compress': DEST_DB_COMPRESS,
+    'connect_timeout': DEST_DB_CONNECT_TIMEOUT,
+    'read_timeout': DEST_DB_READ_TIMEOUT,
+    'charset': DB_CHARSET
 }
 
 # Node patterns
@@ -69,6 +94,21 @@ FILES_PATHS = {
     'last_extracted': './data/last_extracted.json'
 }
 
+# Prefix of the indicator dimension tables the extractor creates when intermediate tables store ID_indicateur
+INDICATOR_DIMENSION_PREFIX = "dim_indicateur_"
+
+# How counters are read for each (table, date): 'per_kpi' runs one filtered query per family and KPI,
+# 'bulk' runs a single query for every counter prefix and dispatches the rows to families and KPIs in memory,
+# 'pushdown' computes KPIs with compiled expressions inside MySQL with INSERT ... SELECT ... GROUP BY
+# (source and destination databases must be on the same server, otherwise 'per_kpi' is used)
+TRANSFORM_MODE = os.getenv("TRANSFORM_MODE", "per_kpi")
+
+# How counter rows are grouped per suffix: 'vectorized' (column-wise pandas operations) or 'rows' (row by row)
+TRANSFORM_ENGINE = os.getenv("TRANSFORM_ENGINE", "vectorized")
+
+# Number of dates whose kpi_summary and detail rows are written and committed in one transaction
+TRANSFORM_FLUSH_DATES = int(os.getenv("TRANSFORM_FLUSH_DATES", default=1))
+
 # Suffix to operator mapping
 SUFFIX_OPERATOR_MAPPING = {
     'nw': 'Inwi',
@@ -143,6 +183,7 @@ KPI_FORMULAS_5MIN = {
         "denominator": ["LoasNSCAN"],
         "Suffix": False,
         "family": "Resource",
+        "expression": "(sum(num) / sum(denom))",
         "formula": lambda num, denom: (sum(num) / sum(denom)) if sum(denom) != 0 else None
     },
     "SGS_UpdateLocation": {
@@ -150,6 +191,7 @@ KPI_FORMULAS_5MIN = {
         "denominator": ["SgsNTLOCREGSGS"],
         "Suffix": False,
         "family": "SGS",
+        "expression": "(sum(num) / sum(denom)) * 100",
         "formula": lambda num, denom: (sum(num) / sum(denom)) * 100 if sum(denom) != 0 else None
     },
     "SGS_SMS_MO": {
@@ -157,6 +199,7 @@ KPI_FORMULAS_5MIN = {
         "denominator": ["SgsNTMOSMS"],
         "Suffix": False,
         "family": "SGS",
+        "expression": "(sum(num) / sum(denom)) * 100",
         "formula": lambda num, denom: (sum(num) / sum(denom)) * 100 if sum(denom) != 0 else None
     },
     "SGS_SMS_MT": {
@@ -164,78 +207,91 @@ KPI_FORMULAS_5MIN = {
         "denominator": ["SgsNTMTSMS"],
         "Suffix": False,
         "family": "SGS",
+        "expression": "(sum(num) / sum(denom)) * 100",
         "formula": lambda num, denom: (sum(num) / sum(denom)) * 100 if sum(denom) != 0 else None
     },
     "TxPaging1": {
         "numerator": ["LocNLAPAG1RESUCC", "LocNLAPAG2RESUCC"],
         "denominator": ["LocNLAPAG1LOTOT"],
         "Suffix": True,
+        "expression": "(sum(num) / sum(denom)) * 100",
         "formula": lambda num, denom: (sum(num) / sum(denom)) * 100 if sum(denom) != 0 else None
     },
     "TxMajLa": {
         "numerator": ["LocNLALOCSUCC"],
         "denominator": ["LocNLALOCTOT"],
         "Suffix": True,
+        "expression": "(sum(num) / sum(denom)) * 100",
         "formula": lambda num, denom: (sum(num) / sum(denom)) * 100 if sum(denom) != 0 else None
     },
     "TxCall_OC": {
         "numerator": ["ChasNCHAFRMSUCC", "ChasNMSFRMSCCI"],
         "denominator": ["ChasNCHAFRMTOT", "ChasNMSFRMTOTI"],
         "Suffix": False,
+        "expression": "(sum(num) / sum(denom)) * 100",
         "formula": lambda num, denom: (sum(num) / sum(denom)) * 100 if sum(denom) != 0 else None
     },
     "TxCall_TC": {
         "numerator": ["ChasNCHATOMSUCC", "ChasNMSTOMSCCO"],
         "denominator": ["ChasNCHATOMTOT", "ChasNMSTOMTOTO"],
         "Suffix": False,
+        "expression": "(sum(num) / sum(denom)) * 100",
         "formula": lambda num, denom: (sum(num) / sum(denom)) * 100 if sum(denom) != 0 else None
     },
     "EffAuthen_HLR": {
         "numerator": ["SecNAUTFTCSUCC"],
         "denominator": ["SecNAUTFTCTOT"],
         "Suffix": False,
+        "expression": "(sum(num) / sum(denom)) * 100",
         "formula": lambda num, denom: (sum(num) / sum(denom)) * 100 if sum(denom) != 0 else None
     },
     "Eff_RABASN_In": {
         "numerator": ["RncNRNFRMSCCI"],
         "denominator": ["RncNRNFRMTOTI"],
         "Suffix": True,
+        "expression": "(sum(num) / sum(denom)) * 100",
         "formula": lambda num, denom: (sum(num) / sum(denom)) * 100 if sum(denom) != 0 else None
     },
     "Eff_RABASN_Out": {
         "numerator": ["RncNRNTOMSCCO"],
         "denominator": ["RncNRNTOMTOTO"],
         "Suffix": True,
+        "expression": "(sum(num) / sum(denom)) * 100",
         "formula": lambda num, denom: (sum(num) / sum(denom)) * 100 if sum(denom) != 0 else None
     },
     "TxHORNCOut": {
         "numerator": ["RncNRNTORGSUCC"],
         "denominator": ["RncNRNTRRRGTOT"],
         "Suffix": True,
+        "expression": "(sum(num) / sum(denom)) * 100",
         "formula": lambda num, denom: (sum(num) / sum(denom)) * 100 if sum(denom) != 0 else None
     },
     "TxHOBSCOut": {
         "numerator": ["BscNBSTOHBSUCC"],
         "denominator": ["BscNBSTRHRTOT"],
         "Suffix": True,
+        "expression": "(sum(num) / sum(denom)) * 100",
         "formula": lambda num, denom: (sum(num) / sum(denom)) * 100 if sum(denom) != 0 else None
     },
     "TxHOBSCIn": {
         "numerator": ["BscNBSTIHBSUCC", "BscNBSTIUGHBSUCC"],
         "denominator": ["BscNBSTSHRTOT", "BscNBSTSUGHRTOT"],
         "Suffix": True,
+        "expression": "(sum(num) / sum(denom)) * 100",
         "formula": lambda num, denom: (sum(num) / sum(denom)) * 100 if sum(denom) != 0 else None
     },
     "TxSms_MO": {
         "numerator": ["ShmNSMSCAOSUCC"],
         "denominator": ["ShmNSMSRDOTOT"],
         "Suffix": False,
+        "expression": "(sum(num) / sum(denom)) * 100",
         "formula": lambda num, denom: (sum(num) / sum(denom)) * 100 if sum(denom) != 0 else None
     },
     "TxSms_MT": {
         "numerator": ["ShmNSMSSRSUCC"],
         "denominator": ["ShmNSMSSMRLTOT"],
         "Suffix": False,
+        "expression": "(sum(num) / sum(denom)) * 100",
         "formula": lambda num, denom: (sum(num) / sum(denom)) * 100 if sum(denom) != 0 else None
     },
     "TRAF_Erlang_S": {
@@ -243,6 +299,7 @@ KPI_FORMULAS_5MIN = {
         "denominator": ["TrunkrouteNSCAN"],
         "Suffix": True,
         "family": "traffic",
+        "expression": "(sum(num) / sum(denom))",
         "formula": lambda num, denom: (sum(num) / sum(denom)) if sum(denom) != 0 else None
     },
     "TRAF_Erlang_E": {
@@ -250,6 +307,7 @@ KPI_FORMULAS_5MIN = {
         "denominator": ["TrunkrouteNSCAN"],
         "Suffix": True,
         "family": "traffic",
+        "expression": "(sum(num) / sum(denom))",
         "formula": lambda num, denom: (sum(num) / sum(denom)) if sum(denom) != 0 else None
     },
     "TRAF_RDT": {
@@ -258,6 +316,7 @@ KPI_FORMULAS_5MIN = {
         "additional": ["TrunkrouteNDEV", "TrunkrouteNBLOCACC"],
         "Suffix": True,
         "family": "traffic",
+        "expression": "((sum(num) / sum(denom)) / (add[0] - (add[1] / sum(denom)))) * 100",
         "formula": lambda num, denom, add: ((sum(num) / sum(denom)) / (add[0] - (add[1] / sum(denom)))) * 100 if (sum(denom) != 0 and (add[0] - (add[1] / sum(denom))) != 0) else None
     },
     "TRAF_CircHS": {
@@ -265,6 +324,7 @@ KPI_FORMULAS_5MIN = {
         "denominator": ["TrunkrouteNSCAN", "TrunkrouteNDEV"],
         "Suffix": True,
         "family": "traffic",
+        "expression": "(sum(num) / denom[0]) / denom[1] * 100",
         "formula": lambda num, denom: (sum(num) / denom[0]) / denom[1] * 100 if (denom[0] != 0 and denom[1] != 0) else None
     },
     "TRAF_ALOC_E": {
@@ -272,6 +332,7 @@ KPI_FORMULAS_5MIN = {
         "denominator": ["TrunkrouteNSCAN", "TrunkrouteNANSWERSI"],
         "Suffix": True,
         "family": "traffic",
+        "expression": "(sum(num) / denom[0]) / denom[1] * 300",
         "formula": lambda num, denom: (sum(num) / denom[0]) / denom[1] * 300 if (denom[0] != 0 and denom[1] != 0) else None
     },
     "TRAF_ALOC_S": {
@@ -279,6 +340,7 @@ KPI_FORMULAS_5MIN = {
         "denominator": ["TrunkrouteNSCAN", "TrunkrouteNANSWERSO"],
         "Suffix": True,
         "family": "traffic",
+        "expression": "(sum(num) / denom[0]) / denom[1] * 300",
         "formula": lambda num, denom: (sum(num) / denom[0]) / denom[1] * 300 if (denom[0] != 0 and denom[1] != 0) else None
     },
     "TRAF_FCS": {
@@ -287,6 +349,7 @@ KPI_FORMULAS_5MIN = {
         "additional": ["TrunkrouteNDEV"],
         "Suffix": True,
         "family": "traffic",
+        "expression": "add[0] - (sum(num) / sum(denom))",
         "formula": lambda num, denom, add: add[0] - (sum(num) / sum(denom)) if sum(denom) != 0 else None
     },
     "ASR_S": {
@@ -294,6 +357,7 @@ KPI_FORMULAS_5MIN = {
         "denominator": ["TrunkrouteNCALLSO", "TrunkrouteNOVERFLOWO"],
         "Suffix": True,
         "family": "ASR",
+        "expression": "(sum(num) / (denom[0] - denom[1])) * 100",
         "formula": lambda num, denom: (sum(num) / (denom[0] - denom[1])) * 100 if (denom[0] - denom[1]) != 0 else None
     },
     "ASR_E": {
@@ -301,6 +365,7 @@ KPI_FORMULAS_5MIN = {
         "denominator": ["TrunkrouteNCALLSI"],
         "Suffix": True,
         "family": "ASR",
+        "expression": "(sum(num) / sum(denom)) * 100",
         "formula": lambda num, denom: (sum(num) / sum(denom)) * 100 if sum(denom) != 0 else None
     },
     "RouteUtilizationIn": {
@@ -308,6 +373,7 @@ KPI_FORMULAS_5MIN = {
         "denominator": ["VoiproNTRAFIND_STASIPI"],
         "Suffix": True,
         "family": "RouteUtilization",
+        "expression": "(sum(num) / sum(denom)) * 100",
         "formula": lambda num, denom: (sum(num) / sum(denom)) * 100 if sum(denom) != 0 else None
     },
     "RouteUtilizationOut": {
@@ -315,12 +381,14 @@ KPI_FORMULAS_5MIN = {
         "denominator": ["VoiproNTRAFIND_STASIPO"],
         "Suffix": True,
         "family": "RouteUtilization",
+        "expression": "(sum(num) / sum(denom)) * 100",
         "formula": lambda num, denom: (sum(num) / sum(denom)) * 100 if sum(denom) != 0 else None
     },
     "Succ_VoIP_Seiz_Attempts": {
         "numerator": ["VoiproIOVERFL"],
         "Suffix": True,
         "family": "Success",
+        "expression": "(1 - sum(num)) * 100",
         "formula": lambda num: (1 - sum(num)) * 100
     },
     "ASR_IN": {
@@ -328,6 +396,7 @@ KPI_FORMULAS_5MIN = {
         "denominator": ["VoiproNCALLSI"],
         "Suffix": True,
         "family": "ASR",
+        "expression": "(sum(num) / sum(denom)) * 100",
         "formula": lambda num, denom: (sum(num) / sum(denom)) * 100 if sum(denom) != 0 else None
     },
     "ASR_OUT": {
@@ -335,6 +404,7 @@ KPI_FORMULAS_5MIN = {
         "denominator": ["VoiproNCALLSO"],
         "Suffix": True,
         "family": "ASR",
+        "expression": "(sum(num) / sum(denom)) * 100",
         "formula": lambda num, denom: (sum(num) / sum(denom)) * 100 if sum(denom) != 0 else None
     },
     "Success_SIP_IN": {
@@ -342,6 +412,7 @@ KPI_FORMULAS_5MIN = {
         "denominator": ["SiproISIPSES"],
         "Suffix": True,
         "family": "Success",
+        "expression": "(sum(num) / sum(denom)) * 100",
         "formula": lambda num, denom: (sum(num) / sum(denom)) * 100 if sum(denom) != 0 else None
     },
     "Success_SIP_OUT": {
@@ -349,24 +420,28 @@ KPI_FORMULAS_5MIN = {
         "denominator": ["SiproOSIPSES"],
         "Suffix": True,
         "family": "Success",
+        "expression": "(sum(num) / sum(denom)) * 100",
         "formula": lambda num, denom: (sum(num) / sum(denom)) * 100 if sum(denom) != 0 else None
     },
     "Invite_Req_Succ_Ratio": {
         "numerator": ["SipnodNUSINVITE"],
         "denominator": ["SipnodNRINVITE"],
         "Suffix": False,
+        "expression": "(1 - (sum(num) / sum(denom))) * 100",
         "formula": lambda num, denom: (1 - (sum(num) / sum(denom))) * 100 if sum(denom) != 0 else None
     },
     "Rec_SIP_Req_Succ_Ratio": {
         "numerator": ["SipnodONSIPRES"],
         "denominator": ["SipnodINSIPREQ"],
         "Suffix": False,
+        "expression": "(sum(num) / sum(denom)) * 100",
         "formula": lambda num, denom: (sum(num) / sum(denom)) * 100 if sum(denom) != 0 else None
     },
     "Sent_SIP_Req_Succ_Ratio": {
         "numerator": ["SipnodINSIPRES"],
         "denominator": ["SipnodONSIPREQ"],
         "Suffix": False,
+        "expression": "(sum(num) / sum(denom)) * 100",
         "formula": lambda num, denom: (sum(num) / sum(denom)) * 100 if sum(denom) != 0 else None
     },
     "ALOC_IN": {
@@ -374,6 +449,7 @@ KPI_FORMULAS_5MIN = {
         "denominator": ["VoiproNSCAN", "VoiproIANSWER"],
         "Suffix": True,
         "family": "ALOC",
+        "expression": "(sum(num) / denom[0]) / denom[1] * 300",
         "formula": lambda num, denom: (sum(num) / denom[0]) / denom[1] * 300 if (denom[0] != 0 and denom[1] != 0) else None
     },
     "ALOC_OUT": {
@@ -381,6 +457,7 @@ KPI_FORMULAS_5MIN = {
         "denominator": ["VoiproNSCAN", "VoiproOANSWER"],
         "Suffix": True,
         "family": "ALOC",
+        "expression": "(sum(num) / denom[0]) / denom[1] * 300",
         "formula": lambda num, denom: (sum(num) / denom[0]) / denom[1] * 300 if (denom[0] != 0 and denom[1] != 0) else None
     },
     "CSFB_MT_Eff": {
@@ -388,6 +465,7 @@ KPI_FORMULAS_5MIN = {
         "denominator": ["CsfbNSPAG1CSFB", "CsfbNSPAG2CSFB"],
         "Suffix": False,
         "family": "CSFB",
+        "expression": "(sum(num) / sum(denom)) * 100",
         "formula": lambda num, denom: (sum(num) / sum(denom)) * 100 if sum(denom) != 0 else None
     },
     "CSFB_Call_MT": {
@@ -395,6 +473,7 @@ KPI_FORMULAS_5MIN = {
         "denominator": ["CsfbNSUCCCSFB", "CsfbNUNSUCCCSFB", "CsfbNUSREJCSFB"],
         "Suffix": False,
         "family": "CSFB",
+        "expression": "(sum(num) / sum(denom)) * 100",
         "formula": lambda num, denom: (sum(num) / sum(denom)) * 100 if sum(denom) != 0 else None
     },
     "CSFB_Paging": {
@@ -402,6 +481,7 @@ KPI_FORMULAS_5MIN = {
         "denominator": ["CsfbNTPAG1CSFB"],
         "Suffix": False,
         "family": "CSFB",
+        "expression": "(sum(num) / sum(denom)) * 100",
         "formula": lambda num, denom: (sum(num) / sum(denom)) * 100 if sum(denom) != 0 else None
     },
     "SGSLA_Attach_Reg": {
@@ -409,6 +489,7 @@ KPI_FORMULAS_5MIN = {
         "denominator": ["SgslaNTLAATREGSGS"],
         "Suffix": True,
         "family": "SGSLA",
+        "expression": "(sum(num) / sum(denom)) * 100",
         "formula": lambda num, denom: (sum(num) / sum(denom)) * 100 if sum(denom) != 0 else None
     },
     "SGSLA_Attach_NonReg": {
@@ -416,6 +497,7 @@ KPI_FORMULAS_5MIN = {
         "denominator": ["SgslaNTLAATNREGSGS"],
         "Suffix": True,
         "family": "SGSLA",
+        "expression": "(sum(num) / sum(denom)) * 100",
         "formula": lambda num, denom: (sum(num) / sum(denom)) * 100 if sum(denom) != 0 else None
     },
     "SGSLA_LocUpdate_Reg": {
@@ -423,6 +505,7 @@ KPI_FORMULAS_5MIN = {
         "denominator": ["SgslaNTLANLREGSGS"],
         "Suffix": True,
         "family": "SGSLA",
+        "expression": "(sum(num) / sum(denom)) * 100",
         "formula": lambda num, denom: (sum(num) / sum(denom)) * 100 if sum(denom) != 0 else None
     },
     "SGSLA_LocUpdate_NonReg": {
@@ -430,6 +513,7 @@ KPI_FORMULAS_5MIN = {
         "denominator": ["SgslaNTLANLNREGSGS"],
         "Suffix": True,
         "family": "SGSLA",
+        "expression": "(sum(num) / sum(denom)) * 100",
         "formula": lambda num, denom: (sum(num) / sum(denom)) * 100 if sum(denom) != 0 else None
     }
 }
@@ -446,6 +530,7 @@ KPI_FORMULAS_15MIN = {
         ],
         "Suffix": True,
         "family": "Paging",
+        "expression": "(sum(num) / sum(denom)) * 100",
         "formula": lambda num, denom: (sum(num) / sum(denom)) * 100 if sum(denom) != 0 else None
     }
 }
@@ -466,6 +551,7 @@ KPI_FORMULAS_MGW = {
             "pmVoIpConnMeasuredJitter8"
         ],
         "Suffix": True,
+        "expression": "(1 - sum(num) / sum(denom)) * 100",
         "formula": lambda num, denom: (1 - sum(num) / sum(denom)) * 100 if sum(denom) != 0 else None
     },
     "LatePktsRatio": {
@@ -480,6 +566,7 @@ KPI_FORMULAS_MGW = {
             "pmVoIpConnLatePktsRatio6"
         ],
         "Suffix": True,
+        "expression": "(1 - sum(num) / sum(denom)) * 100",
         "formula": lambda num, denom: (1 - sum(num) / sum(denom)) * 100 if sum(denom) != 0 else None
     },
     "NoDisturbJitter": {
@@ -490,6 +577,7 @@ KPI_FORMULAS_MGW = {
             "pmIpCnConnMeasuredJitter4", "pmIpCnConnMeasuredJitter5"
         ],
         "Suffix": True,
+        "expression": "(1 - sum(num) / sum(denom)) * 100",
         "formula": lambda num, denom: (1 - sum(num) / sum(denom)) * 100 if sum(denom) != 0 else None
     },
     "IPQoS": {
@@ -499,49 +587,58 @@ KPI_FORMULAS_MGW = {
         ],
         "denominator": ["pmIpInReceives", "pmIpOutRequests"],
         "Suffix": True,
+        "expression": "(1 - sum(num) / sum(denom)) * 100",
         "formula": lambda num, denom: (1 - sum(num) / sum(denom)) * 100 if sum(denom) != 0 else None
     },
     "PktLoss": {
         "numerator": ["pmRtpDiscardedPkts", "pmRtpLostPkts"],
         "denominator": ["pmRtpReceivedPktsHi", "pmRtpReceivedPktsLo", "pmRtpLostPkts"],
         "Suffix": True,
+        "expression": "(sum(num) / (denom[0] * 2^31 + denom[1] + denom[2])) * 100",
         "formula": lambda num, denom: (sum(num) / (denom[0] * 2147483648 + denom[1] + denom[2])) * 100 if (denom[0] * 2147483648 + denom[1] + denom[2]) != 0 else None
     },
     "UseOfLicence": {
         "numerator": ["pmNrOfMeStChUsedVoip"],
         "denominator": ["maxNrOfLicMediaStreamChannelsVoip"],
         "Suffix": True,
+        "expression": "(sum(num) / sum(denom)) * 100",
         "formula": lambda num, denom: (sum(num) / sum(denom)) * 100 if sum(denom) != 0 else None
     },
     "MediaStreamChannelUtilisationRate": {
         "numerator": ["pmNrOfMediaStreamChannelsBusy"],
         "denominator": ["maxNrOfLicMediaStreamChannels"],
         "Suffix": True,
+        "expression": "(sum(num) / sum(denom)) * 100",
         "formula": lambda num, denom: (sum(num) / sum(denom)) * 100 if sum(denom) != 0 else None
     },
     "ReceivedBwLink1WithHeaders": {
         "numerator": ["pmIfInOctetsLink1Hi", "pmIfInOctetsLink1Lo"],
         "Suffix": True,
+        "expression": "((num[0] * 2^31 + num[1]) / (1000000 * 900)) * 8",
         "formula": lambda num: ((num[0] * 2147483648 + num[1]) / (1000000 * 900)) * 8
     },
     "ReceivedBwLink2WithHeaders": {
         "numerator": ["pmIfInOctetsLink2Hi", "pmIfInOctetsLink2Lo"],
         "Suffix": True,
+        "expression": "((num[0] * 2^31 + num[1]) / (1000000 * 900)) * 8",
         "formula": lambda num: ((num[0] * 2147483648 + num[1]) / (1000000 * 900)) * 8
     },
     "TransBwLink1WithHeaders": {
         "numerator": ["pmIfOutOctetsLink1Hi", "pmIfOutOctetsLink1Lo"],
         "Suffix": True,
+        "expression": "((num[0] * 2^31 + num[1]) / (1000000 * 900)) * 8",
         "formula": lambda num: ((num[0] * 2147483648 + num[1]) / (1000000 * 900)) * 8
     },
     "TransBwLink2WithHeaders": {
         "numerator": ["pmIfOutOctetsLink2Hi", "pmIfOutOctetsLink2Lo"],
         "Suffix": True,
+        "expression": "((num[0] * 2^31 + num[1]) / (1000000 * 900)) * 8",
         "formula": lambda num: ((num[0] * 2147483648 + num[1]) / (1000000 * 900)) * 8
     },
     "TotalBwForSig": {
         "numerator": ["pmSctpStatSentChunks", "pmSctpStatRetransChunks"],
         "Suffix": True,
+        "expression": "(sum(num) / (1000000 * 900)) * 8 * 100 * 1.2",
         "formula": lambda num: (sum(num) / (1000000 * 900)) * 8 * 100 * 1.2
     },
     "IPBCPestablishSuccessRate": {
@@ -553,40 +650,47 @@ KPI_FORMULAS_MGW = {
         ],
         "denominator": ["pmNrOfIpTermsReq", "pmNrOfIpTermsRej"],
         "Suffix": True,
+        "expression": "(1 - sum(num) / (denom[0] - denom[1])) * 100",
         "formula": lambda num, denom: (1 - sum(num) / (denom[0] - denom[1])) * 100 if (denom[0] - denom[1]) != 0 else None
     },
     "IPTerminationSuccessRate": {
         "numerator": ["pmNrOfIpTermsRej"],
         "denominator": ["pmNrOfIpTermsReq"],
         "Suffix": True,
+        "expression": "(1 - sum(num) / sum(denom)) * 100",
         "formula": lambda num, denom: (1 - sum(num) / sum(denom)) * 100 if sum(denom) != 0 else None
     },
     "IPInDiscards": {
         "numerator": ["pmIfStatsIpInDiscards"],
         "denominator": ["pmIfStatsIpInReceives"],
         "Suffix": True,
+        "expression": "(sum(num) / sum(denom)) * 100",
         "formula": lambda num, denom: (sum(num) / sum(denom)) * 100 if sum(denom) != 0 else None
     },
     "IPOutDiscards": {
         "numerator": ["pmIfStatsIpOutDiscards"],
         "denominator": ["pmIfStatsIpOutRequests"],
         "Suffix": True,
+        "expression": "(sum(num) / sum(denom)) * 100",
         "formula": lambda num, denom: (sum(num) / sum(denom)) * 100 if sum(denom) != 0 else None
     },
     "pmRtpReceivedPkts": {
         "numerator": ["pmRtpReceivedPktsHi", "pmRtpReceivedPktsLo"],
         "Suffix": True,
+        "expression": "(num[0] * 2^31 + num[1])",
         "formula": lambda num: (num[0] * 2147483648 + num[1])
     },
     "NbIPTermination": {
         "numerator": ["pmNrOfIpTermsReq", "pmNrOfIpTermsRej"],
         "Suffix": True,
+        "expression": "(num[0] - num[1])",
         "formula": lambda num: (num[0] - num[1])
     },
     "LatePktsVoIp": {
         "numerator": ["pmLatePktsVoIp"],
         "denominator": ["pmLatePktsVoIp", "pmSuccTransmittedPktsVoIp"],
         "Suffix": True,
+        "expression": "(sum(num) / sum(denom)) * 100",
         "formula": lambda num, denom: (sum(num) / sum(denom)) * 100 if sum(denom) != 0 else None
     },
     "Pb_IpDatagrams": {
@@ -595,6 +699,7 @@ KPI_FORMULAS_MGW = {
             "pmNoOfIpInDiscards", "pmNoOfIpOutDiscards"
         ],
         "Suffix": True,
+        "expression": "sum(num)",
         "formula": lambda num: sum(num)
     }
 }
@@ -0,0 +1,86 @@
+import pandas as pd
+from typing import Dict, List, Any, Tuple
+
+# Counter roles of a KPI, in the order a counter listed under several of them is assigned
+FIELDS = ["numerator", "denominator", "additional"]
+
+def split_indicateurs(df: pd.DataFrame) -> pd.DataFrame:
+    """Split every indicateur into prefix and suffix in one pass over the column.
+
+    Follows extract_indicateur_suffixe: a name with exactly one '.' is prefix.suffix,
+    anything else only has a prefix. valid_suffix marks rows usable for per-suffix
+    grouping, i.e. with a non-empty suffix other than 'M'.
+    """
+    parts = df["indicateur"].str.split(".")
+    suffix = parts.str[1].where(parts.str.len() == 2)
+    return pd.DataFrame({
+        "prefix": parts.str[0],
+        "suffix": suffix,
+        "valeur": df["valeur"].astype(float),
+        "valid_suffix": suffix.notna() & (suffix != "") & (suffix != "M"),
+    })
+
+def counter_fields(kpi_config: Dict[str, Any]) -> Dict[str, str]:
+    """Map each counter prefix of a KPI to the field it feeds, numerator first."""
+    fields = {}
+    for field in FIELDS:
+        for prefix in kpi_config.get(field, []):
+            fields.setdefault(prefix, field)
+    return fields
+
+def counter_order(kpi_config: Dict[str, Any]) -> Dict[str, int]:
+    """Map each counter prefix of a KPI to its position in the config list of the field it feeds.
+
+    num[i], denom[i] and add[i] refer to counters by this position, as in the push-down SQL,
+    so values are ordered by it rather than by the order the rows come back in.
+    """
+    fields = counter_fields(kpi_config)
+    return {prefix: kpi_config[field].index(prefix) for prefix, field in fields.items()}
+
+def group_counters(counters: List[Tuple[str, Any]], kpi_config: Dict[str, Any]) -> Dict[str, List[float]]:
+    """Split (prefix, valeur) pairs into the numerator, denominator and additional values of a KPI.
+
+    Values are ordered by counter_order, pairs of the same counter keeping their order.
+    """
+    fields = counter_fields(kpi_config)
+    order = counter_order(kpi_config)
+    result = {field: [] for field in FIELDS}
+    for prefix, valeur in sorted((c for c in counters if c[0] in fields), key=lambda c: order[c[0]]):
+        result[fields[prefix]].append(float(valeur))
+    return result
+
+def collect_group_values(frame: pd.DataFrame, kpi_config: Dict[str, Any], suffixes: List[str] = None) -> Dict[Any, Dict[str, List[float]]]:
+    """Collect the numerator, denominator and additional values of a KPI, per suffix or for the whole frame.
+
+    Values are ordered by counter_order inside each list, rows of the same counter keeping
+    the row order of the frame, as in group_counters.
+
+    Args:
+        frame: Output of split_indicateurs.
+        kpi_config: KPI configuration with numerator/denominator/additional counter lists.
+        suffixes: Suffix groups to fill, in output order; None collects every row into one group keyed "".
+
+    Returns:
+        Dictionary of {suffix: {field: [values]}}, with empty lists for fields without rows.
+    """
+    field = frame["prefix"].map(counter_fields(kpi_config))
+    rank = frame["prefix"].map(counter_order(kpi_config))
+    if suffixes is None:
+        ordered = rank[field.notna()].sort_values(kind="stable").index
+        groups = {"": {f: [] for f in FIELDS}}
+        for f, values in frame.loc[ordered, "valeur"].groupby(field[ordered], sort=False):
+            groups[""][f] = values.tolist()
+        return groups
+
+    groups = {suffix: {f: [] for f in FIELDS} for suffix in suffixes}
+    members = field.notna() & frame["valid_suffix"]
+    if members.any():
+        keyed = frame.loc[members, ["suffix", "valeur"]].assign(field=field[members], rank=rank[members])
+        keyed = keyed.sort_values("rank", kind="stable")
+        for (suffix, f), values in keyed.groupby(["suffix", "field"], sort=False)["valeur"]:
+            groups[suffix][f] = values.tolist()
+    return groups
+
+def valid_suffixes(frame: pd.DataFrame) -> List[str]:
+    """Suffixes usable for grouping, in order of first appearance."""
+    return pd.unique(frame.loc[frame["valid_suffix"], "suffix"]).tolist()
@@ -0,0 +1,234 @@
+import ast
+import copy
+import random
+import numpy as np
+from typing import Dict, List, Any, Optional
+
+# Names an expression can refer to, and the group_values field each one reads
+VARIABLES = {"num": "numerator", "denom": "denominator", "add": "additional"}
+
+# Functions an expression can call, applied to a whole counter list
+FUNCTIONS = ("sum",)
+
+
+class FormulaError(ValueError):
+    """Raised when a KPI expression uses syntax outside the formula language."""
+
+
+class CompiledFormula:
+    """A KPI expression compiled once into a NumPy evaluator and a SQL expression builder.
+
+    The language covers numbers, + - * / ^ (power), parentheses, the counter lists
+    num, denom and add, indexing into them (num[0]) and sum(list). Division by zero,
+    and indexing past the end of a list, make the KPI value None, which is what the
+    guarded lambdas in config.py return in those cases.
+    """
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        try:
+            tree = ast.parse(expression.replace("^", "**"), mode="eval")
+        except SyntaxError as e:
+            raise FormulaError(f"Invalid expression '{expression}': {e}") from e
+        self.tree = tree.body
+        _validate(self.tree, expression)
+        self.code = compile(ast.fix_missing_locations(ast.Expression(_NumpyRewriter().visit(copy.deepcopy(tree.body)))), f"<kpi {expression}>", "eval")
+
+    def evaluate(self, groups: List[Dict[str, List[float]]]) -> List[Optional[float]]:
+        """Evaluate the expression for many groups at once.
+
+        Args:
+            groups: One {numerator, denominator, additional} dict of value lists per group.
+
+        Returns:
+            One KPI value per group, None where it is undefined.
+        """
+        if not groups:
+            return []
+        env = {"_sum": _column_sum, "_at": _column_at, "_div": _divide}
+        for name, field in VARIABLES.items():
+            env[name] = _to_matrix([group.get(field, []) for group in groups])
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            result = eval(self.code, {"__builtins__": {}}, env)
+        result = np.broadcast_to(np.asarray(result, dtype=float), (len(groups),))
+        return [float(value) if np.isfinite(value) else None for value in result]
+
+    def to_sql(self, counters: Dict[str, List[str]]) -> str:
+        """Translate the expression into a SQL expression.
+
+        Args:
+            counters: SQL expression of each counter, per field, e.g.
+                {"numerator": ["SUM(...)", ...], "denominator": [...], "additional": [...]}.
+                num[i] refers to the i-th counter of the field; a missing one is NULL.
+
+        Returns:
+            SQL expression that is NULL wherever the KPI value is undefined.
+        """
+        return _to_sql(self.tree, counters)
+
+
+def _validate(node, expression):
+    """Reject anything outside the formula language."""
+    if isinstance(node, ast.BinOp):
+        if not isinstance(node.op, (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow)):
+            raise FormulaError(f"Unsupported operator in '{expression}'")
+        _validate(node.left, expression)
+        _validate(node.right, expression)
+    elif isinstance(node, ast.UnaryOp):
+        if not isinstance(node.op, (ast.USub, ast.UAdd)):
+            raise FormulaError(f"Unsupported operator in '{expression}'")
+        _validate(node.operand, expression)
+    elif isinstance(node, ast.Constant):
+        if not isinstance(node.value, (int, float)) or isinstance(node.value, bool):
+            raise FormulaError(f"Unsupported constant {node.value!r} in '{expression}'")
+    elif isinstance(node, ast.Name):
+        if node.id not in VARIABLES:
+            raise FormulaError(f"Unknown name '{node.id}' in '{expression}'")
+    elif isinstance(node, ast.Subscript):
+        index = node.slice
+        if not (isinstance(node.value, ast.Name) and node.value.id in VARIABLES
+                and isinstance(index, ast.Constant) and isinstance(index.value, int) and index.value >= 0):
+            raise FormulaError(f"Only num/denom/add[<index>] indexing is supported in '{expression}'")
+    elif isinstance(node, ast.Call):
+        if not (isinstance(node.func, ast.Name) and node.func.id in FUNCTIONS and len(node.args) == 1
+                and not node.keywords and isinstance(node.args[0], ast.Name) and node.args[0].id in VARIABLES):
+            raise FormulaError(f"Only sum(num|denom|add) calls are supported in '{expression}'")
+    else:
+        raise FormulaError(f"Unsupported syntax '{ast.dump(node)}' in '{expression}'")
+
+
+class _NumpyRewriter(ast.NodeTransformer):
+    """Rewrite list operations into calls on the (groups x values) matrices."""
+
+    def visit_BinOp(self, node):
+        self.generic_visit(node)
+        if isinstance(node.op, ast.Div):
+            return ast.Call(func=ast.Name(id="_div", ctx=ast.Load()), args=[node.left, node.right], keywords=[])
+        return node
+
+    def visit_Call(self, node):
+        return ast.Call(func=ast.Name(id="_sum", ctx=ast.Load()), args=node.args, keywords=[])
+
+    def visit_Subscript(self, node):
+        return ast.Call(func=ast.Name(id="_at", ctx=ast.Load()), args=[node.value, node.slice], keywords=[])
+
+
+def _to_matrix(lists: List[List[float]]) -> np.ndarray:
+    """Pack value lists of different lengths into a NaN-padded (groups x values) matrix."""
+    width = max((len(values) for values in lists), default=0)
+    matrix = np.full((len(lists), width), np.nan)
+    for row, values in enumerate(lists):
+        matrix[row, :len(values)] = values
+    return matrix
+
+def _column_sum(matrix: np.ndarray) -> np.ndarray:
+    """sum(list) per group; padding is ignored and an empty list sums to 0."""
+    return np.nansum(matrix, axis=1)
+
+def _divide(numerator, denominator):
+    """Division that yields NaN, not inf, on a zero denominator, so the NaN reaches the result."""
+    denominator = np.asarray(denominator, dtype=float)
+    return np.where(denominator == 0, np.nan, numerator / np.where(denominator == 0, 1, denominator))
+
+def _column_at(matrix: np.ndarray, index: int) -> np.ndarray:
+    """list[index] per group; NaN where the list is too short."""
+    if index >= matrix.shape[1]:
+        return np.full(matrix.shape[0], np.nan)
+    return matrix[:, index]
+
+
+def _to_sql(node, counters):
+    """Recursively build the SQL text of an expression node."""
+    if isinstance(node, ast.BinOp):
+        left, right = _to_sql(node.left, counters), _to_sql(node.right, counters)
+        if isinstance(node.op, ast.Div):
+            return f"({left} / NULLIF({right}, 0))"
+        if isinstance(node.op, ast.Pow):
+            return f"POW({left}, {right})"
+        operator = {ast.Add: "+", ast.Sub: "-", ast.Mult: "*"}[type(node.op)]
+        return f"({left} {operator} {right})"
+    if isinstance(node, ast.UnaryOp):
+        return f"({'-' if isinstance(node.op, ast.USub) else '+'}{_to_sql(node.operand, counters)})"
+    if isinstance(node, ast.Constant):
+        return repr(node.value)
+    if isinstance(node, ast.Subscript):
+        columns = counters.get(VARIABLES[node.value.id], [])
+        return columns[node.slice.value] if node.slice.value < len(columns) else "NULL"
+    if isinstance(node, ast.Call):
+        columns = counters.get(VARIABLES[node.args[0].id], [])
+        return f"({' + '.join(f'COALESCE({c}, 0)' for c in columns)})" if columns else "0"
+    raise FormulaError(f"Cannot translate {ast.dump(node)} to SQL")
+
+
+def evaluate_lambda(kpi_config: Dict[str, Any], group_values: Dict[str, List[float]]) -> Optional[float]:
+    """Apply a KPI's Python lambda the way Transformer.calculate_kpi does, with errors as None."""
+    formula = kpi_config["formula"]
+    try:
+        if "additional" in kpi_config:
+            return formula(group_values["numerator"], group_values["denominator"], group_values["additional"])
+        if "denominator" in kpi_config:
+            return formula(group_values["numerator"], group_values["denominator"])
+        return formula(group_values["numerator"])
+    except Exception:
+        return None
+
+def parity_samples(kpi_config: Dict[str, Any], count: int = 200, seed: int = 0) -> List[Dict[str, List[float]]]:
+    """Build sample group values for a KPI: full lists, zeros, and lists with counters missing."""
+    rng = random.Random(seed)
+    samples = []
+    for i in range(count):
+        group = {}
+        for field in VARIABLES.values():
+            size = len(kpi_config.get(field, []))
+            if i % 5 == 4:
+                size = rng.randint(0, size)
+            group[field] = [float(rng.choice([0, 0, 1, rng.randint(0, 10 ** rng.randint(1, 9))])) for _ in range(size)]
+        samples.append(group)
+    return samples
+
+def check_parity(kpi_config: Dict[str, Any], compiled: CompiledFormula, samples: List[Dict[str, List[float]]] = None) -> List[Dict[str, Any]]:
+    """Compare a compiled expression with the KPI's lambda on sample inputs.
+
+    Returns:
+        The samples on which the two disagree (beyond floating point rounding), with both values.
+    """
+    samples = samples if samples is not None else parity_samples(kpi_config)
+    mismatches = []
+    for group, value in zip(samples, compiled.evaluate(samples)):
+        expected = evaluate_lambda(kpi_config, group)
+        if expected is None or value is None:
+            same = expected is None and value is None
+        else:
+            same = bool(np.isclose(value, expected, rtol=1e-9, atol=1e-12))
+        if not same:
+            mismatches.append({"group_values": group, "expected": expected, "compiled": value})
+    return mismatches
+
+def compile_kpi_formulas(kpi_formulas: Dict[str, Any], logger=None) -> Dict[str, CompiledFormula]:
+    """Compile the 'expression' of every KPI that has one, keeping only those matching their lambda.
+
+    KPIs without an expression, with an invalid one, or whose compiled expression disagrees
+    with the lambda on the parity samples are left out, so callers fall back to the lambda.
+    """
+    compiled = {}
+    for kpi, kpi_config in kpi_formulas.items():
+        expression = kpi_config.get("expression")
+        if not expression:
+            continue
+        try:
+            formula = CompiledFormula(expression)
+        except FormulaError as e:
+            if logger:
+                logger.warning(f"Using the lambda for {kpi}: {e}")
+            continue
+        if "formula" in kpi_config:
+            mismatches = check_parity(kpi_config, formula)
+            if mismatches:
+                if logger:
+                    logger.warning(f"Using the lambda for {kpi}: expression '{expression}' disagrees on {len(mismatches)} samples, e.g. {mismatches[0]}")
+                continue
+        compiled[kpi] = formula
+    if logger:
+        logger.info(f"Compiled {len(compiled)}/{len(kpi_formulas)} KPI expressions")
+    return compiled
+
@@ -0,0 +1,173 @@
+from typing import Dict, List, Any, Tuple
+from utils.engine import FIELDS, counter_fields
+from utils.formulas import CompiledFormula
+from utils.tools import SUMMARY_KEY_SQL_DATE_FORMAT, SUMMARY_KEY_HEX_DIGITS, upsert_clause
+
+# A SQL fragment together with the parameters of its %s placeholders, in order
+Fragment = Tuple[str, List[Any]]
+
+def effective_counters(kpi_config: Dict[str, Any]) -> Dict[str, List[str]]:
+    """Counters whose values end up in each field's list, in config order.
+
+    A counter listed under several fields only feeds the first one, as in the
+    row-by-row grouping, so later fields skip it.
+    """
+    fields = counter_fields(kpi_config)
+    effective = {field: [] for field in FIELDS}
+    for field in FIELDS:
+        for prefix in kpi_config.get(field, []):
+            if fields[prefix] == field and prefix not in effective[field]:
+                effective[field].append(prefix)
+    return effective
+
+def listed_counters(kpi_config: Dict[str, Any]) -> List[str]:
+    """Every counter prefix a KPI lists, deduplicated, in config order."""
+    prefixes = []
+    for field in FIELDS:
+        for prefix in kpi_config.get(field, []):
+            if prefix not in prefixes:
+                prefixes.append(prefix)
+    return prefixes
+
+def summary_key_sql(date_column: str, node: str, data_type: str) -> Fragment:
+    """SQL expression of the kpi_summary Id of each date, matching tools.summary_key."""
+    sql = (f"CAST(CONV(LEFT(SHA1(CONCAT_WS('|', %s, %s, DATE_FORMAT({date_column}, %s))), "
+           f"{SUMMARY_KEY_HEX_DIGITS}), 16, 10) AS UNSIGNED)")
+    return sql, [data_type or "", node, SUMMARY_KEY_SQL_DATE_FORMAT]
+
+def operator_case(suffix_column: str, suffix_operator_mapping: Dict[str, str]) -> Fragment:
+    """CASE expression resolving the operator of a suffix like Transformer.insert_kpi_details."""
+    lowered = f"LOWER({suffix_column})"
+    sql = f"CASE WHEN {lowered} LIKE '%%nw%%' AND ({lowered} LIKE '%%ie%%' OR {lowered} LIKE '%%is%%') THEN 'Inwi International'"
+    params = []
+    for op_suffix, operator in suffix_operator_mapping.items():
+        sql += f" WHEN {lowered} LIKE %s THEN %s"
+        params += [f"%{op_suffix}%", operator]
+    return sql + " ELSE 'Unknown' END", params
+
+def aggregate_counters(source_table: str, dimension: str, counters: List[str], by_suffix: bool) -> Fragment:
+    """Subquery summing each counter per Date (and suffix) over the rows the Python path would read.
+
+    Rows are selected with the same indicateur LIKE 'prefix%' filter as filter_indicateur_values;
+    a row adds to a counter when the part before its first '.' is exactly that counter.
+    Grouping by suffix keeps only names with a single '.' and a suffix other than '' and 'M'.
+    """
+    if dimension:
+        relation = f"{source_table} t JOIN {dimension} d ON d.ID_indicateur = t.ID_indicateur"
+        indicateur = "d.indicateur"
+    else:
+        relation = f"{source_table} t"
+        indicateur = "t.indicateur"
+    prefix = f"CAST(SUBSTRING_INDEX({indicateur}, '.', 1) AS BINARY)"
+    suffix = f"SUBSTRING_INDEX({indicateur}, '.', -1)"
+
+    columns = ["t.Date AS Date"] + ([f"{suffix} AS suffix"] if by_suffix else [])
+    columns += [f"SUM(CASE WHEN {prefix} = %s THEN t.valeur END) AS c{i}" for i in range(len(counters))]
+    conditions = [f"({' OR '.join(f'{indicateur} LIKE %s' for _ in counters)})"]
+    if by_suffix:
+        conditions += [f"CHAR_LENGTH({indicateur}) - CHAR_LENGTH(REPLACE({indicateur}, '.', '')) = 1",
+                       f"{suffix} <> ''", f"CAST({suffix} AS BINARY) <> 'M'"]
+    sql = f"""
+            SELECT {', '.join(columns)}
+            FROM {relation}
+            WHERE {' AND '.join(conditions)}
+            GROUP BY Date{', suffix' if by_suffix else ''}
+        """
+    return sql, list(counters) + [f"{p}%" for p in counters]
+
+def counter_columns(kpi_config: Dict[str, Any], column_of: Dict[str, str]) -> List[Tuple[str, str]]:
+    """(details column, SQL value) pairs for the counter columns of a KPI, 0 where a counter has no rows."""
+    return [(prefix, f"COALESCE({column_of[prefix]}, 0)") for prefix in listed_counters(kpi_config)]
+
+def kpi_value(kpi_config: Dict[str, Any], formula: CompiledFormula, column_of: Dict[str, str]) -> str:
+    """SQL expression of a KPI value over the aggregated counter columns."""
+    effective = effective_counters(kpi_config)
+    return formula.to_sql({field: [column_of[p] for p in effective[field]] for field in FIELDS})
+
+def build_kpi_insert(kpi: str, kpi_config: Dict[str, Any], formula: CompiledFormula, source_table: str, dimension: str,
+                     node: str, data_type: str, suffix_operator_mapping: Dict[str, str]) -> Fragment:
+    """INSERT ... SELECT computing a non-family KPI for every date of a source table.
+
+    KPIs with Suffix get one row per (date, suffix); the others one row per date,
+    even for dates without counters, as the Python path does. Rows are upserted
+    under the deterministic kpi_summary Id of their date.
+    """
+    by_suffix = bool(kpi_config.get("Suffix", False))
+    counters = listed_counters(kpi_config)
+    column_of = {counter: f"g.c{i}" for i, counter in enumerate(counters)}
+    aggregate_sql, aggregate_params = aggregate_counters(source_table, dimension, counters, by_suffix)
+    if by_suffix:
+        relation, params = f"({aggregate_sql}) g", aggregate_params
+        key_sql, key_params = summary_key_sql("g.Date", node, data_type)
+    else:
+        relation, params = f"(SELECT DISTINCT Date FROM {source_table}) dd LEFT JOIN ({aggregate_sql}) g ON g.Date = dd.Date", aggregate_params
+        key_sql, key_params = summary_key_sql("dd.Date", node, data_type)
+
+    columns, values, select_params = ["kpi_id"], [key_sql], list(key_params)
+    if by_suffix:
+        operator_sql, operator_params = operator_case("g.suffix", suffix_operator_mapping)
+        columns += ["suffix", "operator"]
+        values += ["g.suffix", operator_sql]
+        select_params += operator_params
+    else:
+        columns.append("operator")
+        values.append("NULL")
+    for column, value in counter_columns(kpi_config, column_of):
+        columns.append(column)
+        values.append(value)
+    columns.append("value")
+    values.append(kpi_value(kpi_config, formula, column_of))
+
+    sql = f"""
+        INSERT INTO {kpi}_details ({', '.join(columns)})
+        SELECT {', '.join(values)}
+        FROM {relation}
+        {upsert_clause([column for column in columns if column not in ("kpi_id", "suffix")])}
+    """
+    return sql, select_params + params
+
+def build_family_insert(family: str, kpis: List[str], kpi_formulas: Dict[str, Any], formulas: Dict[str, CompiledFormula],
+                        source_table: str, dimension: str, node: str, data_type: str,
+                        suffix_operator_mapping: Dict[str, str]) -> Fragment:
+    """INSERT ... SELECT computing every KPI of a family per (date, suffix) of a source table.
+
+    Mirrors insert_family_details: a counter column adds up the counter once per KPI
+    and field listing it, and family_sum adds up the KPI values that are not NULL.
+    Rows are upserted under the deterministic kpi_summary Id of their date.
+    """
+    counters = []
+    for kpi in kpis:
+        counters += [prefix for prefix in listed_counters(kpi_formulas[kpi]) if prefix not in counters]
+    column_of = {counter: f"g.c{i}" for i, counter in enumerate(counters)}
+    aggregate_sql, aggregate_params = aggregate_counters(source_table, dimension, counters, True)
+    operator_sql, operator_params = operator_case("g.suffix", suffix_operator_mapping)
+    key_sql, key_params = summary_key_sql("g.Date", node, data_type)
+
+    counter_terms = {}
+    for kpi in kpis:
+        effective = effective_counters(kpi_formulas[kpi])
+        for field in FIELDS:
+            for prefix in effective[field]:
+                counter_terms.setdefault(prefix, []).append(f"COALESCE({column_of[prefix]}, 0)")
+            for prefix in kpi_formulas[kpi].get(field, []):
+                counter_terms.setdefault(prefix, [])
+
+    detail_columns = list(counter_terms)
+    inner = [f"{key_sql} AS kpi_id", "g.suffix AS suffix", f"{operator_sql} AS operator"]
+    inner += [f"{' + '.join(counter_terms[c]) or '0'} AS `{c}`" for c in detail_columns]
+    inner += [f"{kpi_value(kpi_formulas[kpi], formulas[kpi], column_of)} AS `{kpi}`" for kpi in kpis]
+    family_sum = (f"CASE WHEN COALESCE({', '.join(f'v.`{kpi}`' for kpi in kpis)}) IS NULL THEN NULL "
+                  f"ELSE {' + '.join(f'COALESCE(v.`{kpi}`, 0)' for kpi in kpis)} END")
+
+    columns = ["kpi_id", "suffix", "operator"] + detail_columns + list(kpis) + ["family_sum"]
+    outer = ["v.kpi_id", "v.suffix", "v.operator"] + [f"v.`{c}`" for c in detail_columns] + [f"v.`{kpi}`" for kpi in kpis] + [family_sum]
+    sql = f"""
+        INSERT INTO {family}_details ({', '.join(columns)})
+        SELECT {', '.join(outer)}
+        FROM (
+            SELECT {', '.join(inner)}
+            FROM ({aggregate_sql}) g
+        ) v
+        {upsert_clause([column for column in columns if column not in ("kpi_id", "suffix")])}
+    """
+    return sql, key_params + operator_params + aggregate_params
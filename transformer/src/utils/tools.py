@@ -1,4 +1,7 @@
 import MySQLdb
+import re
+import hashlib
+from datetime import datetime
 from typing import Dict, Any
 from tenacity import retry, stop_after_attempt, wait_exponential
 from utils.logger import setup_logging
@@ -7,10 +10,20 @@ from utils.logger import setup_logging
 def get_tools_logger(data_type=None):
     return setup_logging("Tools", data_type=data_type)
 
+# Optional MySQLdb.connect arguments taken from a database config when set
+CONNECTION_OPTIONS = ('compress', 'connect_timeout', 'read_timeout', 'charset')
+
+# Date format hashed into kpi_summary keys, and its MySQL DATE_FORMAT equivalent
+SUMMARY_KEY_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+SUMMARY_KEY_SQL_DATE_FORMAT = '%Y-%m-%d %H:%i:%s'
+# Hex digits of the SHA1 digest kept in a key: 60 bits, which fits a signed BIGINT
+SUMMARY_KEY_HEX_DIGITS = 15
+
 @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10))
 def connect_database(config: Dict[str, Any], data_type=None):
-    """Connect to the database using mysqlclient with retries."""
+    """Connect to the database using mysqlclient with retries, applying the config's connection options."""
     logger = get_tools_logger(data_type)
+    options = {key: config[key] for key in CONNECTION_OPTIONS if config.get(key)}
     try:
         logger.info(f"Connecting to database config: {config}")
         conn = MySQLdb.connect(
@@ -18,7 +31,8 @@ def connect_database(config: Dict[str, Any], data_type=None):
             user=config['user'],
             passwd=config['password'],
             port=config['port'],
-            db=config['database']
+            db=config['database'],
+            **options
         )
         logger.info(f"Successfully connected to database: {config['database']} on {config['host']}")
         return conn
@@ -32,7 +46,7 @@ def create_main_table(cursor, data_type=None):
     try:
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS kpi_summary (
-                Id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+                Id BIGINT NOT NULL PRIMARY KEY,
                 Date DATETIME NOT NULL,
                 Node VARCHAR(50) NOT NULL
             );
@@ -45,12 +59,13 @@ def create_main_table(cursor, data_type=None):
 def create_kpi_tables(cursor, KPI_FORMULAS, KPI_FAMILIES, data_type=None):
     """Create KPI-specific tables based on KPI_FORMULAS and KPI_FAMILIES config."""
     logger = get_tools_logger(data_type)
+    unique_keys = get_details_unique_keys(KPI_FORMULAS, KPI_FAMILIES)
     try:
         # Create family-based tables
         for family, kpis in KPI_FAMILIES.items():
             columns_set = {
                 "id INT NOT NULL AUTO_INCREMENT PRIMARY KEY",
-                "kpi_id INT NOT NULL",
+                "kpi_id BIGINT NOT NULL",
                 "operator VARCHAR(50)",
                 "suffix VARCHAR(50)",
                 "type VARCHAR(10)"
@@ -69,7 +84,7 @@ def create_kpi_tables(cursor, KPI_FORMULAS, KPI_FAMILIES, data_type=None):
             
             ordered_columns = [
                 "id INT NOT NULL AUTO_INCREMENT PRIMARY KEY",
-                "kpi_id INT NOT NULL",
+                "kpi_id BIGINT NOT NULL",
                 "operator VARCHAR(50)",
                 "suffix VARCHAR(50)",
             ]
@@ -83,6 +98,7 @@ def create_kpi_tables(cursor, KPI_FORMULAS, KPI_FAMILIES, data_type=None):
             create_query = f"""
             CREATE TABLE IF NOT EXISTS {family}_details (
                 {columns_str},
+                UNIQUE KEY uq_kpi_suffix (kpi_id, suffix),
                 FOREIGN KEY (kpi_id) REFERENCES kpi_summary(Id) 
             );
             """
@@ -93,7 +109,7 @@ def create_kpi_tables(cursor, KPI_FORMULAS, KPI_FAMILIES, data_type=None):
         for kpi, config in KPI_FORMULAS.items():
             if config.get('family') in KPI_FAMILIES:
                 continue
-            columns_set = {"kpi_id INT NOT NULL"}
+            columns_set = {"kpi_id BIGINT NOT NULL"}
             if config.get('Suffix', False):
                 columns_set.add("suffix VARCHAR(50)")
             columns_set.add("operator VARCHAR(50)")
@@ -106,10 +122,12 @@ def create_kpi_tables(cursor, KPI_FORMULAS, KPI_FAMILIES, data_type=None):
                 columns_set.add(f"{col} FLOAT")
             columns_set.add("value FLOAT")
             columns_str = ",\n    ".join(sorted(columns_set))
+            unique_key = unique_keys[f"{kpi}_details"]
             create_query = f"""
             CREATE TABLE IF NOT EXISTS {kpi}_details (
                 id INT NOT NULL AUTO_INCREMENT PRIMARY KEY,
                 {columns_str},
+                UNIQUE KEY uq_kpi_suffix ({unique_key}),
                 FOREIGN KEY (kpi_id) REFERENCES kpi_summary(Id)
             );
             """
@@ -119,12 +137,71 @@ def create_kpi_tables(cursor, KPI_FORMULAS, KPI_FAMILIES, data_type=None):
         logger.error(f"Error creating KPI tables: {e}")
         raise
 
+def get_details_unique_keys(KPI_FORMULAS, KPI_FAMILIES):
+    """Map every details table to the columns of its uq_kpi_suffix unique key."""
+    unique_keys = {f"{family}_details": "kpi_id, suffix" for family in KPI_FAMILIES}
+    for kpi, config in KPI_FORMULAS.items():
+        if config.get('family') in KPI_FAMILIES:
+            continue
+        unique_keys[f"{kpi}_details"] = "kpi_id, suffix" if config.get('Suffix', False) else "kpi_id"
+    return unique_keys
+
+def get_column_definition(cursor, table, column):
+    """Return the (DATA_TYPE, EXTRA) of a column in the current database, or None if it does not exist."""
+    cursor.execute("""
+        SELECT DATA_TYPE, EXTRA FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+    """, (table, column))
+    row = cursor.fetchone()
+    return (row[0].lower(), (row[1] or "").lower()) if row else None
+
+def migrate_tables(cursor, KPI_FORMULAS, KPI_FAMILIES, data_type=None):
+    """Bring tables created before deterministic kpi_summary keys up to the current schema.
+
+    CREATE TABLE IF NOT EXISTS leaves existing tables untouched, so kpi_summary.Id and the
+    details kpi_id columns are widened from INT (AUTO_INCREMENT) to BIGINT, and the
+    uq_kpi_suffix unique keys the upserts rely on are added where missing. Adding a unique
+    key fails if a table already holds duplicate rows, which stops the run instead of
+    letting upserts insert more duplicates.
+    """
+    logger = get_tools_logger(data_type)
+    unique_keys = get_details_unique_keys(KPI_FORMULAS, KPI_FAMILIES)
+    try:
+        widen = []
+        if get_column_definition(cursor, "kpi_summary", "Id") != ("bigint", ""):
+            widen.append(("kpi_summary", "Id"))
+        for table in unique_keys:
+            if get_column_definition(cursor, table, "kpi_id")[0] != "bigint":
+                widen.append((table, "kpi_id"))
+        if widen:
+            # The foreign keys tie kpi_summary.Id to every kpi_id column, so they are widened with checks off
+            cursor.execute("SET FOREIGN_KEY_CHECKS = 0")
+            try:
+                for table, column in widen:
+                    cursor.execute(f"ALTER TABLE {table} MODIFY {column} BIGINT NOT NULL")
+                    logger.info(f"Migrated {table}.{column} to BIGINT")
+            finally:
+                cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
+
+        for table, columns in unique_keys.items():
+            cursor.execute("""
+                SELECT 1 FROM information_schema.STATISTICS
+                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = 'uq_kpi_suffix'
+            """, (table,))
+            if not cursor.fetchone():
+                cursor.execute(f"ALTER TABLE {table} ADD UNIQUE KEY uq_kpi_suffix ({columns})")
+                logger.info(f"Added unique key uq_kpi_suffix ({columns}) to {table}")
+    except MySQLdb.Error as e:
+        logger.error(f"Error migrating tables to the deterministic kpi_summary key schema: {e}")
+        raise
+
 def create_tables(cursor, KPI_FORMULAS, KPI_FAMILIES, data_type=None):
     """Create all necessary tables in the database."""
     logger = get_tools_logger(data_type)
     try:
         create_main_table(cursor, data_type)
         create_kpi_tables(cursor, KPI_FORMULAS, KPI_FAMILIES, data_type)
+        migrate_tables(cursor, KPI_FORMULAS, KPI_FAMILIES, data_type)
         logger.info("✅ All tables created successfully.")
     except MySQLdb.Error as e:
         logger.error(f"Error creating tables: {e}")
@@ -158,4 +235,23 @@ def extract_indicateur_suffixe(indicateur, data_type=None):
         return parts[0], parts[1]
     
     logger.debug(f"Extracted indicateur '{parts[0]}' with no suffix")
-    return parts[0], None
\ No newline at end of file
+    return parts[0], None
+
+def get_base_table_name(table):
+    """Strip the _S<week>_A<year> suffix from a table name."""
+    return re.sub(r'_s\d+_a\d{4}$', '', table, flags=re.IGNORECASE)
+
+def summary_key(node, date, data_type=None):
+    """Deterministic kpi_summary Id of a (Node, Date, data_type).
+
+    The first SUMMARY_KEY_HEX_DIGITS hex digits of the SHA1 of 'data_type|node|date',
+    the same value pushdown.summary_key_sql computes inside MySQL.
+    """
+    if not isinstance(date, datetime):
+        date = datetime.fromisoformat(str(date))
+    text = "|".join([data_type or "", node, date.strftime(SUMMARY_KEY_DATE_FORMAT)])
+    return int(hashlib.sha1(text.encode("utf-8")).hexdigest()[:SUMMARY_KEY_HEX_DIGITS], 16)
+
+def upsert_clause(columns):
+    """ON DUPLICATE KEY UPDATE clause overwriting the given columns, so re-runs replace rows instead of duplicating them."""
+    return "ON DUPLICATE KEY UPDATE " + ", ".join(f"{column} = VALUES({column})" for column in columns)
@@ -1,11 +1,18 @@
 import pandas as pd
 from typing import Dict, List, Any
 from utils.logger import setup_logging
+from utils.config import INDICATOR_DIMENSION_PREFIX, TRANSFORM_MODE, TRANSFORM_ENGINE, TRANSFORM_FLUSH_DATES
+from utils.engine import split_indicateurs, collect_group_values, valid_suffixes, group_counters
+from utils.formulas import compile_kpi_formulas
+from utils.pushdown import build_kpi_insert, build_family_insert, summary_key_sql
 from utils.tools import (
     connect_database,
     create_tables,
     extract_noeud,
     extract_indicateur_suffixe,
+    get_base_table_name,
+    summary_key,
+    upsert_clause,
 )
 
 
@@ -35,6 +42,30 @@ class Transformer:
         self.file_path = file_path
         self.tables = self.load_tables()
         self.data_type = data_type
+        self.indicator_dimensions = {}
+        self.transform_mode = TRANSFORM_MODE
+        self.transform_engine = TRANSFORM_ENGINE
+        self.compiled_formulas = compile_kpi_formulas(kpi_formulas, self.logger)
+        self.prefix_index = self.build_prefix_index()
+        self.pushdown_schema = self.get_pushdown_schema(source_db_config, dest_db_config)
+        self.flush_dates = max(1, TRANSFORM_FLUSH_DATES)
+        self.write_buffer = {}
+        self.buffered_rows = 0
+
+    def get_pushdown_schema(self, source_db_config: Dict[str, Any], dest_db_config: Dict[str, Any]) -> str:
+        """Return the source database to read from in SQL push-down mode, or None when it cannot be used.
+
+        Push-down runs INSERT ... SELECT on the destination connection, so the source
+        tables must live on the same MySQL server.
+        """
+        if self.transform_mode != "pushdown":
+            return None
+        same_server = all(source_db_config.get(key) == dest_db_config.get(key) for key in ("host", "port"))
+        if not same_server:
+            self.logger.warning("Source and destination databases are on different servers, "
+                                "falling back to the per_kpi transform mode")
+            return None
+        return source_db_config["database"]
 
     def load_tables(self) -> List[str]:
         """Load table names from result_type.txt."""
@@ -82,35 +113,78 @@ class Transformer:
         self.logger.warning(f"No node found in table name: {table}")
         return None
 
-    def filter_indicateur_values(
-        self, table: str, date: str, kpi: str = None, family: str = None
-    ) -> pd.DataFrame:
-        """Filter indicateur values for a specific KPI or family and date from the source database."""
-        if family:
-            kpis = self.kpi_families[family]
-            prefixes = set()
-            for k in kpis:
-                config = self.kpi_formulas[k]
-                prefixes.update(
-                    config.get("numerator", [])
-                    + config.get("denominator", [])
-                    + config.get("additional", [])
-                )
-            prefixes = list(prefixes)
-        else:
-            kpi_config = self.kpi_formulas[kpi]
-            prefixes = (
-                kpi_config.get("numerator", [])
-                + kpi_config.get("denominator", [])
-                + kpi_config.get("additional", [])
-            )
-
+    def get_indicator_dimension(self, table: str) -> str:
+        """Return the indicator dimension table to join for a source table, or None.
+
+        Intermediate tables that store ID_indicateur instead of the indicator name
+        are resolved through the dim_indicateur_<base> table created by the extractor.
+        """
+        if table not in self.indicator_dimensions:
+            try:
+                self.source_cursor.execute(f"SHOW COLUMNS FROM {table} LIKE 'ID_indicateur'")
+                if self.source_cursor.fetchone():
+                    dimension = f"{INDICATOR_DIMENSION_PREFIX}{get_base_table_name(table)}"
+                    self.logger.info(f"Table {table} stores indicator IDs, resolving names through {dimension}")
+                else:
+                    dimension = None
+                self.indicator_dimensions[table] = dimension
+            except Exception as e:
+                self.logger.error(f"Error inspecting columns of {table}: {e}")
+                raise
+        return self.indicator_dimensions[table]
+
+    def get_prefixes(self, kpi: str = None, family: str = None) -> List[str]:
+        """Collect the counter prefixes a KPI, or every KPI of a family, is computed from."""
+        kpis = self.kpi_families[family] if family else [kpi]
+        prefixes = []
+        for k in kpis:
+            config = self.kpi_formulas[k]
+            for prefix in config.get("numerator", []) + config.get("denominator", []) + config.get("additional", []):
+                if prefix not in prefixes:
+                    prefixes.append(prefix)
+        return prefixes
+
+    def get_consumers(self) -> List[tuple]:
+        """List the (kind, name) pairs process() reads counters for: families, then KPIs outside any family."""
+        consumers = [("family", family) for family in self.kpi_families]
+        for kpi in self.kpi_formulas.keys():
+            if self.kpi_formulas[kpi].get("family") in self.kpi_families:
+                continue
+            consumers.append(("kpi", kpi))
+        return consumers
+
+    def build_prefix_index(self) -> Dict[str, List[tuple]]:
+        """Index every counter prefix (lowercased, as LIKE compares them) to the consumers that read it."""
+        index = {}
+        self.all_prefixes = []
+        for kind, name in self.get_consumers():
+            prefixes = self.get_prefixes(family=name) if kind == "family" else self.get_prefixes(kpi=name)
+            for prefix in prefixes:
+                if prefix not in self.all_prefixes:
+                    self.all_prefixes.append(prefix)
+                consumers = index.setdefault(prefix.lower(), [])
+                if (kind, name) not in consumers:
+                    consumers.append((kind, name))
+        self.prefix_lengths = sorted({len(prefix) for prefix in index})
+        return index
+
+    def query_indicateur_values(self, table: str, date: str, prefixes: List[str], label: str) -> pd.DataFrame:
+        """Fetch the (indicateur, valeur) rows of a date whose indicateur starts with one of the prefixes."""
         try:
-            query = f"""
-                SELECT indicateur, valeur
-                FROM {table}
-                WHERE Date = %s AND ({' OR '.join(['indicateur LIKE %s' for _ in prefixes])})
-            """
+            dimension = self.get_indicator_dimension(table)
+            if dimension:
+                query = f"""
+                    SELECT d.indicateur, t.valeur
+                    FROM {table} t
+                    JOIN {dimension} d ON d.ID_indicateur = t.ID_indicateur
+                    WHERE t.Date = %s AND ({' OR '.join(['d.indicateur LIKE %s' for _ in prefixes])})
+                """
+            else:
+                query = f"""
+                    SELECT indicateur, valeur
+                    FROM {table}
+                    WHERE Date = %s AND ({' OR '.join(['indicateur LIKE %s' for _ in prefixes])})
+                """
             params = [date] + [f"{prefix}%" for prefix in prefixes]
             self.source_cursor.execute(query, params)
             data = self.source_cursor.fetchall()
@@ -118,19 +192,47 @@ class Transformer:
             df = pd.DataFrame(data, columns=["indicateur", "valeur"])
             if df.empty:
                 self.logger.warning(
-                    f"No data found for {kpi or family} on {date} in {table}"
+                    f"No data found for {label} on {date} in {table}"
                 )
             else:
                 self.logger.info(
-                    f"Filtered {len(df)} indicateur values for {kpi or family} on {date} from {table}"
+                    f"Filtered {len(df)} indicateur values for {label} on {date} from {table}"
                 )
             return df
         except Exception as e:
             self.logger.error(
-                f"Error filtering indicateur values for {kpi or family} from {table}: {e}"
+                f"Error filtering indicateur values for {label} from {table}: {e}"
             )
             raise
 
+    def filter_indicateur_values(
+        self, table: str, date: str, kpi: str = None, family: str = None
+    ) -> pd.DataFrame:
+        """Filter indicateur values for a specific KPI or family and date from the source database."""
+        prefixes = self.get_prefixes(kpi=kpi, family=family)
+        return self.query_indicateur_values(table, date, prefixes, kpi or family)
+
+    def filter_all_indicateur_values(self, table: str, date: str) -> Dict[tuple, pd.DataFrame]:
+        """Read every counter of a date in one query and split the rows per family and KPI.
+
+        A row goes to each consumer with a prefix the indicateur starts with (case-insensitively,
+        like the LIKE filter of filter_indicateur_values, with '_' taken literally), found by
+        looking up the indicateur's leading characters at every indexed prefix length.
+        """
+        df = self.query_indicateur_values(table, date, self.all_prefixes, "all KPIs")
+        rows = {consumer: [] for consumer in self.get_consumers()}
+        for position, indicateur in enumerate(df["indicateur"]):
+            lowered = indicateur.lower()
+            matched = set()
+            for length in self.prefix_lengths:
+                if length > len(lowered):
+                    break
+                for consumer in self.prefix_index.get(lowered[:length], []):
+                    if consumer not in matched:
+                        matched.add(consumer)
+                        rows[consumer].append(position)
+        return {consumer: df.iloc[positions].reset_index(drop=True) for consumer, positions in rows.items()}
+
     def group_by_suffix(self, df: pd.DataFrame, family: str) -> List[Dict[str, Any]]:
         """Group filtered data by full suffix for family KPIs, collecting all KPI values."""
         grouped = {}
@@ -199,16 +301,13 @@ class Transformer:
         self, df: pd.DataFrame, kpi_config: Dict
     ) -> Dict[str, List[float]]:
         """Calculate values for numerator, denominator, and additional fields."""
-        result = {"numerator": [], "denominator": [], "additional": []}
+        if self.transform_engine == "vectorized":
+            return collect_group_values(split_indicateurs(df), kpi_config)[""]
+        counters = []
         for _, row in df.iterrows():
             prefix, _ = extract_indicateur_suffixe(row["indicateur"], self.data_type)
-            if prefix in kpi_config.get("numerator", []):
-                result["numerator"].append(float(row["valeur"]))
-            elif prefix in kpi_config.get("denominator", []):
-                result["denominator"].append(float(row["valeur"]))
-            elif prefix in kpi_config.get("additional", []):
-                result["additional"].append(float(row["valeur"]))
-        return result
+            counters.append((prefix, row["valeur"]))
+        return group_counters(counters, kpi_config)
 
     def calculate_kpi(self, kpi: str, group_values: Dict[str, List[float]]) -> float:
         """Calculate KPI value using the formula."""
@@ -239,22 +338,55 @@ class Transformer:
             self.logger.error(f"Error calculating {kpi}: {e}")
             return None
 
+    def calculate_kpis(self, kpi: str, groups: List[Dict[str, List[float]]]) -> List[float]:
+        """Calculate a KPI for several groups, in one vectorized pass when its expression is compiled."""
+        formula = self.compiled_formulas.get(kpi)
+        if formula is None:
+            return [self.calculate_kpi(kpi, group_values) for group_values in groups]
+        values = formula.evaluate(groups)
+        self.logger.info(f"Calculated {kpi} for {len(groups)} groups with '{formula.expression}': {values}")
+        return values
+
     def insert_kpi_summary(self, date: str, node: str) -> int:
-        """Insert into kpi_summary in the destination database and return the generated ID."""
+        """Buffer the kpi_summary row of a date and return its ID.
+
+        The ID is derived from (Node, Date, data_type), so it is known without a round
+        trip and a re-run upserts the same row. The row is written ahead of its detail
+        rows by flush_writes.
+        """
+        kpi_id = summary_key(node, date, self.data_type)
+        query = f"INSERT INTO kpi_summary (Id, Date, Node) VALUES (%s, %s, %s) {upsert_clause(['Date', 'Node'])}"
+        self.buffer_write(query, [kpi_id, date, node])
+        self.logger.info(
+            f"Queued kpi_summary: Date={date}, Node={node}, ID={kpi_id}"
+        )
+        return kpi_id
+
+    def buffer_write(self, query: str, values: List[Any]):
+        """Queue a row; rows sharing an INSERT statement are written together by flush_writes."""
+        self.write_buffer.setdefault(query, []).append(values)
+        self.buffered_rows += 1
+
+    def flush_writes(self):
+        """Write the buffered rows with one executemany per statement, in the order the statements were first
+        queued (kpi_summary before its details), and commit them in one transaction."""
         try:
-            query = "INSERT INTO kpi_summary (Date, Node) VALUES (%s, %s)"
-            self.dest_cursor.execute(query, (date, node))
+            for query, rows in self.write_buffer.items():
+                self.dest_cursor.executemany(query, rows)
             self.dest_conn.commit()
-            self.dest_cursor.execute("SELECT LAST_INSERT_ID()")
-            kpi_id = self.dest_cursor.fetchone()[0]
-            self.logger.info(
-                f"Inserted into kpi_summary: Date={date}, Node={node}, ID={kpi_id}"
-            )
-            return kpi_id
+            if self.buffered_rows:
+                tables = [query.split()[2] for query in self.write_buffer]
+                summary_rows = sum(len(rows) for table, rows in zip(tables, self.write_buffer.values()) if table == "kpi_summary")
+                self.logger.info(
+                    f"Flushed {summary_rows} summary and {self.buffered_rows - summary_rows} detail rows into {len(set(tables))} tables"
+                )
         except Exception as e:
-            self.logger.error(f"Error inserting into kpi_summary: {e}")
+            self.logger.error(f"Error flushing {self.buffered_rows} buffered rows: {e}")
             self.dest_conn.rollback()
             raise
+        finally:
+            self.write_buffer = {}
+            self.buffered_rows = 0
 
     def insert_kpi_details(
         self,
@@ -264,7 +396,7 @@ class Transformer:
         group_values: Dict[str, List[float]],
         kpi_value: float,
     ):
-        """Insert into non-family KPI details table."""
+        """Buffer a row for a non-family KPI details table."""
         kpi_config = self.kpi_formulas[kpi]
         table_name = f"{kpi}_details"
 
@@ -306,18 +438,9 @@ class Transformer:
         values = list(column_value_map.values())
         params = ["%s"] * len(columns)
 
-        try:
-            query = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({', '.join(params)})"
-            self.dest_cursor.execute(query, values)
-            self.dest_conn.commit()
-            operator_log = column_value_map.get("operator", "None")
-            self.logger.info(
-                f"Inserted into {table_name}: kpi_id={kpi_id}, suffix={suffix}, operator={operator_log}, columns={columns}"
-            )
-        except Exception as e:
-            self.logger.error(f"Error inserting into {table_name}: {e}")
-            self.dest_conn.rollback()
-            raise
+        updated = [column for column in columns if column not in ("kpi_id", "suffix")]
+        query = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({', '.join(params)}) {upsert_clause(updated)}"
+        self.buffer_write(query, values)
 
     def insert_family_details(
         self,
@@ -327,7 +450,7 @@ class Transformer:
         kpi_values: Dict[str, float],
         group_values: Dict[str, Dict[str, List[float]]],
     ):
-        """Insert into family details table with KPI-specific columns and family_sum."""
+        """Buffer a row for a family details table with KPI-specific columns and family_sum."""
         table_name = f"{family}_details"
 
         column_value_map = {
@@ -396,18 +519,118 @@ class Transformer:
         values = list(column_value_map.values())
         params = ["%s"] * len(columns)
 
+        updated = [column for column in columns if column not in ("kpi_id", "suffix")]
+        query = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({', '.join(params)}) {upsert_clause(updated)}"
+        self.buffer_write(query, values)
+
+    def process_family(self, family: str, table: str, date: str, kpi_summary_id: int, bulk_values: Dict[tuple, pd.DataFrame] = None):
+        """Compute and insert the KPIs of a family for one date of a table."""
+        if bulk_values is not None:
+            df = bulk_values[("family", family)]
+        else:
+            df = self.filter_indicateur_values(table, date, family=family)
+        grouped_data = self.group_by_suffix(df, family)
+
+        for group in grouped_data:
+            suffix = group["suffix"]
+            kpi_values = group["kpi_values"]
+            group_values = group["group_values"]
+            self.insert_family_details(
+                family, kpi_summary_id, suffix, kpi_values, group_values
+            )
+
+    def process_kpi(self, kpi: str, table: str, date: str, kpi_summary_id: int, bulk_values: Dict[tuple, pd.DataFrame] = None):
+        """Compute and insert a non-family KPI for one date of a table."""
+        if bulk_values is not None:
+            df = bulk_values[("kpi", kpi)]
+        else:
+            df = self.filter_indicateur_values(table, date, kpi=kpi)
+        grouped_data = self.group_by_suffix(df, kpi)
+        kpi_values = self.calculate_kpis(kpi, [group["values"] for group in grouped_data])
+
+        for group, kpi_value in zip(grouped_data, kpi_values):
+            suffix = group["suffix"]
+            group_values = group["values"]
+            self.insert_kpi_details(
+                kpi, kpi_summary_id, suffix, group_values, kpi_value
+            )
+
+    def insert_table_summaries(self, table: str, node: str) -> int:
+        """Upsert the kpi_summary rows of every distinct date of a source table in a single statement.
+
+        Returns:
+            The affected row count; 0 when every row already existed unchanged.
+        """
         try:
-            query = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({', '.join(params)})"
-            self.dest_cursor.execute(query, values)
-            self.dest_conn.commit()
-            self.logger.info(
-                f"Inserted into {table_name}: kpi_id={kpi_id}, suffix={suffix}, operator={operator}, kpi_values={kpi_values}, family_sum={family_sum}"
+            key_sql, key_params = summary_key_sql("dd.Date", node, self.data_type)
+            self.dest_cursor.execute(
+                f"""
+                INSERT INTO kpi_summary (Id, Date, Node)
+                SELECT {key_sql}, dd.Date, %s
+                FROM (SELECT DISTINCT Date FROM `{self.pushdown_schema}`.{table}) dd
+                {upsert_clause(['Date', 'Node'])}
+                """,
+                key_params + [node],
             )
+            count = self.dest_cursor.rowcount
+            self.logger.info(f"Upserted kpi_summary rows for {table}, Node={node}: {count} rows affected")
+            return count
+        except Exception as e:
+            self.logger.error(f"Error inserting kpi_summary rows for {table}: {e}")
+            self.dest_conn.rollback()
+            raise
+
+    def process_table_pushdown(self, table: str, node: str):
+        """Compute every KPI of a table inside MySQL with one INSERT ... SELECT ... GROUP BY per family and KPI.
+
+        The counter rows never leave the database server. Families and KPIs whose
+        formula has no compiled expression are computed in Python, date by date.
+        """
+        # rowcount is 0 when a re-run upserts unchanged summaries, so the source dates decide whether to go on
+        dates = self.get_distinct_dates(table)
+        if not dates:
+            return
+        self.insert_table_summaries(table, node)
+        source_table = f"`{self.pushdown_schema}`.{table}"
+        dimension = self.get_indicator_dimension(table)
+        if dimension:
+            dimension = f"`{self.pushdown_schema}`.{dimension}"
+
+        fallback = []
+        try:
+            for kind, name in self.get_consumers():
+                kpis = self.kpi_families[name] if kind == "family" else [name]
+                if not all(kpi in self.compiled_formulas for kpi in kpis):
+                    fallback.append((kind, name))
+                    continue
+                if kind == "family":
+                    query, params = build_family_insert(
+                        name, kpis, self.kpi_formulas, self.compiled_formulas, source_table, dimension,
+                        node, self.data_type, self.suffix_operator_mapping,
+                    )
+                else:
+                    query, params = build_kpi_insert(
+                        name, self.kpi_formulas[name], self.compiled_formulas[name], source_table, dimension,
+                        node, self.data_type, self.suffix_operator_mapping,
+                    )
+                self.dest_cursor.execute(query, params)
+                self.logger.info(f"Pushed down {name} for {table}: {self.dest_cursor.rowcount} rows affected in {name}_details")
         except Exception as e:
-            self.logger.error(f"Error inserting into {table_name}: {e}")
+            self.logger.error(f"Error computing KPIs in SQL for {table}: {e}")
             self.dest_conn.rollback()
             raise
 
+        if fallback:
+            self.logger.info(f"Computing {[name for _, name in fallback]} in Python for {table}")
+            for date in dates:
+                kpi_summary_id = summary_key(node, date, self.data_type)
+                for kind, name in fallback:
+                    if kind == "family":
+                        self.process_family(name, table, date, kpi_summary_id)
+                    else:
+                        self.process_kpi(name, table, date, kpi_summary_id)
+        self.flush_writes()
+
     def process(self):
         """Main process to handle all tables."""
         self.create_tables()
@@ -417,37 +640,28 @@ class Transformer:
             if not node:
                 continue
 
+            if self.pushdown_schema:
+                self.process_table_pushdown(table, node)
+                continue
+
             dates = self.get_distinct_dates(table)
-            for date in dates:
+            for position, date in enumerate(dates, 1):
                 kpi_summary_id = self.insert_kpi_summary(date, node)
+                bulk_values = self.filter_all_indicateur_values(table, date) if self.transform_mode == "bulk" else None
 
                 # Process family-based KPIs
-                for family, kpis in self.kpi_families.items():
-                    df = self.filter_indicateur_values(table, date, family=family)
-                    grouped_data = self.group_by_suffix(df, family)
-
-                    for group in grouped_data:
-                        suffix = group["suffix"]
-                        kpi_values = group["kpi_values"]
-                        group_values = group["group_values"]
-                        self.insert_family_details(
-                            family, kpi_summary_id, suffix, kpi_values, group_values
-                        )
+                for family in self.kpi_families:
+                    self.process_family(family, table, date, kpi_summary_id, bulk_values)
 
                 # Process non-family KPIs
                 for kpi in self.kpi_formulas.keys():
                     if self.kpi_formulas[kpi].get("family") in self.kpi_families:
                         continue
-                    df = self.filter_indicateur_values(table, date, kpi=kpi)
-                    grouped_data = self.group_by_suffix(df, kpi)
-
-                    for group in grouped_data:
-                        suffix = group["suffix"]
-                        group_values = group["values"]
-                        kpi_value = self.calculate_kpi(kpi, group_values)
-                        self.insert_kpi_details(
-                            kpi, kpi_summary_id, suffix, group_values, kpi_value
-                        )
+                    self.process_kpi(kpi, table, date, kpi_summary_id, bulk_values)
+
+                # Commit the summary and detail rows of every flush_dates dates together
+                if position % self.flush_dates == 0 or position == len(dates):
+                    self.flush_writes()
 
     def group_by_suffix(
         self, df: pd.DataFrame, kpi_or_family: str
@@ -465,6 +679,15 @@ class Transformer:
                     }
                 ]
 
+            if self.transform_engine == "vectorized":
+                frame = split_indicateurs(df)
+                grouped = collect_group_values(frame, kpi_config, valid_suffixes(frame))
+                result = [{"suffix": suffix, "values": values} for suffix, values in grouped.items()]
+                self.logger.info(
+                    f"Grouped data by suffix for {kpi_or_family}: {[item['suffix'] for item in result]}"
+                )
+                return result
+
             grouped = {}
             for _, row in df.iterrows():
                 prefix, suffix = extract_indicateur_suffixe(row["indicateur"], self.data_type)
@@ -480,30 +703,14 @@ class Transformer:
                     )
                     continue
 
-                if suffix not in grouped:
-                    grouped[suffix] = {
-                        "numerator": [],
-                        "denominator": [],
-                        "additional": [],
-                    }
-
-                if prefix in kpi_config.get("numerator", []):
-                    grouped[suffix]["numerator"].append(float(row["valeur"]))
-                elif prefix in kpi_config.get("denominator", []):
-                    grouped[suffix]["denominator"].append(float(row["valeur"]))
-                elif prefix in kpi_config.get("additional", []):
-                    grouped[suffix]["additional"].append(float(row["valeur"]))
+                grouped.setdefault(suffix, []).append((prefix, row["valeur"]))
 
             result = [
                 {
                     "suffix": suffix,
-                    "values": {
-                        "numerator": data["numerator"],
-                        "denominator": data["denominator"],
-                        "additional": data["additional"],
-                    },
+                    "values": group_counters(counters, kpi_config),
                 }
-                for suffix, data in grouped.items()
+                for suffix, counters in grouped.items()
             ]
 
             self.logger.info(
@@ -511,11 +718,9 @@ class Transformer:
             )
             return result
 
-    def group_by_suffix_for_family(
-        self, df: pd.DataFrame, family: str
-    ) -> List[Dict[str, Any]]:
-        """Group filtered data by full suffix for family KPIs, collecting all KPI values."""
-        grouped = {}
+    def group_family_rows(self, df: pd.DataFrame, family: str) -> Dict[str, Dict[str, Any]]:
+        """Row-by-row grouping of a family's counters per suffix, used by the 'rows' engine."""
+        rows = {}
         for _, row in df.iterrows():
             prefix, suffix = extract_indicateur_suffixe(row["indicateur"], self.data_type)
             if not suffix:
@@ -528,39 +733,38 @@ class Transformer:
                 )
                 continue
 
-            if suffix not in grouped:
-                grouped[suffix] = {"kpi_values": {}, "group_values": {}}
+            rows.setdefault(suffix, []).append((prefix, row["valeur"]))
 
+        grouped = {}
+        for suffix, counters in rows.items():
+            grouped[suffix] = {
+                "kpi_values": {},
+                "group_values": {kpi: group_counters(counters, self.kpi_formulas[kpi]) for kpi in self.kpi_families[family]},
+            }
+        return grouped
+
+    def group_by_suffix_for_family(
+        self, df: pd.DataFrame, family: str
+    ) -> List[Dict[str, Any]]:
+        """Group filtered data by full suffix for family KPIs, collecting all KPI values."""
+        if self.transform_engine == "vectorized":
+            frame = split_indicateurs(df)
+            suffixes = valid_suffixes(frame)
+            grouped = {suffix: {"kpi_values": {}, "group_values": {}} for suffix in suffixes}
             for kpi in self.kpi_families[family]:
-                kpi_config = self.kpi_formulas[kpi]
-                if kpi not in grouped[suffix]["group_values"]:
-                    grouped[suffix]["group_values"][kpi] = {
-                        "numerator": [],
-                        "denominator": [],
-                        "additional": [],
-                    }
+                for suffix, values in collect_group_values(frame, self.kpi_formulas[kpi], suffixes).items():
+                    grouped[suffix]["group_values"][kpi] = values
+        else:
+            grouped = self.group_family_rows(df, family)
 
-                if prefix in kpi_config.get("numerator", []):
-                    grouped[suffix]["group_values"][kpi]["numerator"].append(
-                        float(row["valeur"])
-                    )
-                elif prefix in kpi_config.get("denominator", []):
-                    grouped[suffix]["group_values"][kpi]["denominator"].append(
-                        float(row["valeur"])
-                    )
-                elif prefix in kpi_config.get("additional", []):
-                    grouped[suffix]["group_values"][kpi]["additional"].append(
-                        float(row["valeur"])
-                    )
+        # Every suffix group holds values for every KPI of the family
+        for kpi in self.kpi_families[family]:
+            kpi_values = self.calculate_kpis(kpi, [data["group_values"][kpi] for data in grouped.values()])
+            for data, kpi_value in zip(grouped.values(), kpi_values):
+                data["kpi_values"][kpi] = kpi_value
 
         result = []
         for suffix, data in grouped.items():
-            for kpi in self.kpi_families[family]:
-                if kpi in data["group_values"]:
-                    kpi_value = self.calculate_kpi(kpi, data["group_values"][kpi])
-                    data["kpi_values"][kpi] = kpi_value
-                else:
-                    data["kpi_values"][kpi] = None
             result.append(
                 {
                     "suffix": suffix,
@@ -0,0 +1,59 @@
+import pandas as pd
+import pytest
+from utils.config import KPI_FORMULAS_MGW
+from utils.engine import split_indicateurs, collect_group_values, valid_suffixes, group_counters
+
+# KPIs whose formulas read counters by position, e.g. denom[0] - denom[1]
+POSITIONAL_KPIS = ["IPBCPestablishSuccessRate", "NbIPTermination"]
+
+
+def config_rows(kpi_config, suffixes=("A", "B")):
+    """(indicateur, valeur) rows for every counter of a KPI and suffix, in config order, with distinct values."""
+    rows = []
+    for suffix in suffixes:
+        for field in ("numerator", "denominator", "additional"):
+            for prefix in kpi_config.get(field, []):
+                rows.append((f"{prefix}.{suffix}", float(len(rows) + 1)))
+    return rows
+
+
+def frame(rows):
+    return pd.DataFrame(rows, columns=["indicateur", "valeur"])
+
+
+@pytest.mark.parametrize("kpi", POSITIONAL_KPIS)
+@pytest.mark.parametrize("shuffle", [sorted, lambda rows: sorted(rows, reverse=True)], ids=["ascending", "descending"])
+def test_collect_group_values_ignores_row_order(kpi, shuffle):
+    kpi_config = KPI_FORMULAS_MGW[kpi]
+    rows = config_rows(kpi_config)
+    expected = collect_group_values(split_indicateurs(frame(rows)), kpi_config, ["A", "B"])
+
+    shuffled = split_indicateurs(frame(shuffle(rows)))
+    assert collect_group_values(shuffled, kpi_config, ["A", "B"]) == expected
+    assert collect_group_values(shuffled, kpi_config, valid_suffixes(shuffled))["A"] == expected["A"]
+
+
+@pytest.mark.parametrize("kpi", POSITIONAL_KPIS)
+def test_group_counters_matches_vectorized_engine(kpi):
+    kpi_config = KPI_FORMULAS_MGW[kpi]
+    rows = sorted(config_rows(kpi_config, suffixes=("A",)))
+    counters = [(indicateur.split(".")[0], valeur) for indicateur, valeur in rows]
+
+    assert group_counters(counters, kpi_config) == collect_group_values(split_indicateurs(frame(rows)), kpi_config)[""]
+
+
+def test_values_follow_config_positions():
+    kpi_config = KPI_FORMULAS_MGW["NbIPTermination"]
+    # "Rej" sorts before "Req", but num[0] is pmNrOfIpTermsReq
+    rows = [("pmNrOfIpTermsRej.A", 3.0), ("pmNrOfIpTermsReq.A", 10.0)]
+
+    grouped = collect_group_values(split_indicateurs(frame(rows)), kpi_config, ["A"])
+    assert grouped["A"]["numerator"] == [10.0, 3.0]
+    assert kpi_config["formula"](grouped["A"]["numerator"]) == 7.0
+
+
+def test_same_counter_keeps_row_order():
+    kpi_config = {"numerator": ["a", "b"]}
+    counters = [("b", 1), ("a", 2), ("b", 3), ("a", 4), ("c", 5)]
+
+    assert group_counters(counters, kpi_config) == {"numerator": [2.0, 4.0, 1.0, 3.0], "denominator": [], "additional": []}
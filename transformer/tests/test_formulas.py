@@ -0,0 +1,75 @@
+import pytest
+from utils.config import CONFIGS, KPI_FORMULAS_MGW
+from utils.formulas import CompiledFormula, FormulaError, check_parity, compile_kpi_formulas
+
+ALL_KPIS = [(data_type, kpi) for data_type, config in CONFIGS.items() for kpi in config["kpi_formulas"]]
+
+
+@pytest.mark.parametrize("data_type, kpi", ALL_KPIS, ids=[f"{data_type}-{kpi}" for data_type, kpi in ALL_KPIS])
+def test_expression_matches_lambda(data_type, kpi):
+    kpi_config = CONFIGS[data_type]["kpi_formulas"][kpi]
+    assert kpi_config.get("expression"), f"{kpi} has no expression"
+    assert check_parity(kpi_config, CompiledFormula(kpi_config["expression"])) == []
+
+
+@pytest.mark.parametrize("data_type", list(CONFIGS))
+def test_every_kpi_compiles(data_type):
+    kpi_formulas = CONFIGS[data_type]["kpi_formulas"]
+    assert set(compile_kpi_formulas(kpi_formulas)) == set(kpi_formulas)
+
+
+def test_zero_denominator_is_none():
+    formula = CompiledFormula("sum(num) / sum(denom) * 100")
+    groups = [
+        {"numerator": [5.0], "denominator": [0.0, 0.0]},
+        {"numerator": [5.0], "denominator": []},
+        {"numerator": [5.0], "denominator": [-2.0, 2.0]},
+    ]
+    assert formula.evaluate(groups) == [None, None, None]
+
+
+def test_denominator_cancelling_to_zero_is_none():
+    kpi_config = KPI_FORMULAS_MGW["IPBCPestablishSuccessRate"]
+    groups = [{"numerator": [1.0], "denominator": [7.0, 7.0]}]
+    assert CompiledFormula(kpi_config["expression"]).evaluate(groups) == [None]
+    assert check_parity(kpi_config, CompiledFormula(kpi_config["expression"]), groups) == []
+
+
+def test_negative_denominator_keeps_its_value():
+    formula = CompiledFormula("num[0] / (denom[0] - denom[1])")
+    assert formula.evaluate([{"numerator": [6.0], "denominator": [1.0, 4.0]}]) == [-2.0]
+
+
+@pytest.mark.parametrize("expression", ["num[2]", "num[0] + denom[1]", "add[0] * 2"])
+def test_index_past_the_list_is_none(expression):
+    groups = [{"numerator": [1.0, 2.0], "denominator": [3.0], "additional": []}]
+    assert CompiledFormula(expression).evaluate(groups) == [None]
+
+
+def test_index_past_a_shorter_group_only_affects_that_group():
+    groups = [{"numerator": [1.0, 2.0]}, {"numerator": [1.0]}]
+    assert CompiledFormula("num[0] - num[1]").evaluate(groups) == [-1.0, None]
+
+
+@pytest.mark.parametrize("expression", ["num[-1]", "num[0:1]", "max(num)", "num.sum()", "x + 1", "'a'", "num[0] % 2"])
+def test_unsupported_syntax_is_rejected(expression):
+    with pytest.raises(FormulaError):
+        CompiledFormula(expression)
+
+
+def test_to_sql_for_suffix_kpi():
+    kpi_config = KPI_FORMULAS_MGW["IPBCPestablishSuccessRate"]
+    assert kpi_config["Suffix"]
+    counters = {
+        "numerator": [f"g.n{i}" for i in range(len(kpi_config["numerator"]))],
+        "denominator": ["g.d0", "g.d1"],
+        "additional": [],
+    }
+    sum_num = " + ".join(f"COALESCE(g.n{i}, 0)" for i in range(len(kpi_config["numerator"])))
+    assert CompiledFormula(kpi_config["expression"]).to_sql(counters) == f"((1 - (({sum_num}) / NULLIF((g.d0 - g.d1), 0))) * 100)"
+
+
+def test_to_sql_missing_counter_is_null():
+    sql = CompiledFormula("(num[0] * 2^31 + num[1])").to_sql({"numerator": ["g.c0"]})
+    assert sql == "((g.c0 * POW(2, 31)) + NULL)"
+    assert CompiledFormula("sum(add)").to_sql({}) == "0"